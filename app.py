@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import convert, ops
+import convert, ops, dtoa, strtof
 
 COLORS = {
     "almond": "#F1DAC4",  # background base
@@ -15,6 +15,14 @@ SUBHEADING_FONT = ("Cambria", 14, "bold")
 BODY_FONT = ("Georgia", 12)
 BODY_FONT_BOLD = ("Georgia", 12, "bold")
 
+# precision radio value -> bit layout used for breakdowns and the learning mode;
+# the FP8 precisions are laid out from convert.FP8_FORMATS instead
+PRECISION_FORMATS = {
+    "32": convert.BINARY32,
+    "64": convert.BINARY64,
+    "bf16": convert.BFLOAT16,
+}
+
 class IEEE754GUI(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -41,7 +49,7 @@ class IEEE754GUI(tk.Tk):
         rb_kwargs = {
             "font": ("Georgia", 14, "bold"),
             "indicatoron": 0,            # render as toggle button
-            "width": 12,
+            "width": 9,
             "padx": 6,
             "pady": 6,
             "bd": 1,
@@ -57,6 +65,11 @@ class IEEE754GUI(tk.Tk):
         precision_frame.pack(pady=4)   # default pack centers the frame contents
         tk.Radiobutton(precision_frame, text="32-bit", variable=self.precision, value="32", **rb_kwargs).pack(side="left", padx=8)
         tk.Radiobutton(precision_frame, text="64-bit", variable=self.precision, value="64", **rb_kwargs).pack(side="left", padx=8)
+        tk.Radiobutton(precision_frame, text="bfloat16", variable=self.precision, value="bf16", **rb_kwargs).pack(side="left", padx=8)
+        fp8_frame = tk.Frame(self.left_frame, bg=COLORS["rose"])
+        fp8_frame.pack(pady=4)
+        tk.Radiobutton(fp8_frame, text="FP8 E4M3", variable=self.precision, value="e4m3", **rb_kwargs).pack(side="left", padx=8)
+        tk.Radiobutton(fp8_frame, text="FP8 E5M2", variable=self.precision, value="e5m2", **rb_kwargs).pack(side="left", padx=8)
         self.build_left_panel()
         self.build_right_panel()
 
@@ -99,7 +112,7 @@ class IEEE754GUI(tk.Tk):
         self.result_box.pack(fill="x", padx=5, pady=5)
         tk.Label(self.right_frame, text="🔎 Output Breakdown", font=SUBHEADING_FONT,
                  bg=COLORS["rose"], fg=COLORS["black"]).pack(anchor="w", padx=5, pady=5)
-        self.breakdown_box = tk.Text(self.right_frame, height=3, bg="white", fg="black",
+        self.breakdown_box = tk.Text(self.right_frame, height=4, bg="white", fg="black",
                                    wrap="word", font=BODY_FONT)
         self.breakdown_box.pack(fill="x", padx=5, pady=5)
         self.learning_btn = tk.Button(self.right_frame,
@@ -114,7 +127,12 @@ class IEEE754GUI(tk.Tk):
         try:
             num = float(self.decimal_entry.get())
             if self.precision.get() == "32":
-                binary = convert.float_to_ieee754(num)
+                # parse straight to float32: float() first would round twice
+                binary = f"{strtof.parse_float32(self.decimal_entry.get()):032b}"
+            elif self.precision.get() == "bf16":
+                binary = convert.float_to_ieee754_bf16(num)
+            elif self.precision.get() in convert.FP8_FORMATS:
+                binary = convert.float_to_ieee754_fp8(num, self.precision.get())
             else:
                 binary = convert.float_to_ieee754_64(num)
             self.ieee_entry.delete(0, tk.END)
@@ -126,11 +144,22 @@ class IEEE754GUI(tk.Tk):
 
     def convert_ieee(self):
         try:
-            binary = self.ieee_entry.get()
             if self.precision.get() == "32":
-                num = convert.ieee754_to_float(binary)
+                bits = convert.parse_ieee754(self.ieee_entry.get(), 32)
+                binary = f"{bits:032b}"
+                num = dtoa.shortest_repr(bits, convert.BINARY32)
+            elif self.precision.get() == "bf16":
+                bits = convert.parse_ieee754(self.ieee_entry.get(), 16)
+                binary = f"{bits:016b}"
+                num = dtoa.shortest_repr(bits, convert.BFLOAT16)
+            elif self.precision.get() in convert.FP8_FORMATS:
+                bits = convert.parse_ieee754(self.ieee_entry.get(), 8)
+                binary = f"{bits:08b}"
+                num = convert.bits_to_float_fp8(bits, self.precision.get())
             else:
-                num = convert.ieee754_to_float_64(binary)
+                bits = convert.parse_ieee754(self.ieee_entry.get(), 64)
+                binary = f"{bits:064b}"
+                num = convert.bits_to_float64(bits)
             self.decimal_entry.delete(0, tk.END)
             self.decimal_entry.insert(0, str(num))
             self.result_box.insert(tk.END, f"IEEE754 {binary} → Decimal: {num}\n")
@@ -138,19 +167,45 @@ class IEEE754GUI(tk.Tk):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
+    def current_format(self):
+        return PRECISION_FORMATS[self.precision.get()]
+
+    def current_layout(self):
+        """(width, ebits, mbits, bias) of the selected precision."""
+        spec = convert.FP8_FORMATS.get(self.precision.get())
+        if spec is not None:
+            return 8, spec["ebits"], spec["mbits"], spec["bias"]
+        fmt = self.current_format()
+        return fmt.width, fmt.ebits, fmt.mbits, fmt.bias
+
+    def decompose(self, bits):
+        # FP8 patterns are classified by their own NaN/infinity encodings, not IEEE rules
+        if self.precision.get() in convert.FP8_FORMATS:
+            return convert.fp8_fields(bits, self.precision.get())
+        return self.current_format().decompose(bits)
+
     def breakdown(self, binary):
-        if self.precision.get() == "32":
-            s, e, m = binary[0], binary[1:9], binary[9:]
-        else:
-            s, e, m = binary[0], binary[1:12], binary[12:]
+        _, ebits, mbits, _ = self.current_layout()
+        fields = self.decompose(int(binary, 2))
+        s = str(fields.sign)
+        e = format(fields.exponent, f"0{ebits}b")
+        m = format(fields.mantissa, f"0{mbits}b")
         self.breakdown_box.delete("1.0", tk.END)
         self.breakdown_box.insert(tk.END, f"S: {s}\nE: {e}\nM: {m}")
+        if self.precision.get() in ("32", "64"):
+            hexfloat = convert.bits_to_hexfloat(int(binary, 2), int(self.precision.get()))
+            self.breakdown_box.insert(tk.END, f"\nHex: {hexfloat}")
 
     def add_op(self):
         try:
             a, b = float(self.op_entry1.get()), float(self.op_entry2.get())
             if self.precision.get() == "32":
                 res = ops.add_floats(a, b)
+            elif self.precision.get() == "bf16":
+                res = convert.bits_to_float_bf16(convert.float_to_bits_bf16(ops.add_floats(a, b)))
+            elif self.precision.get() in convert.FP8_FORMATS:
+                fmt = self.precision.get()
+                res = convert.bits_to_float_fp8(convert.float_to_bits_fp8(ops.add_floats(a, b), fmt), fmt)
             else:
                 res = ops.add_floats_64(a, b)
             self.result_box.insert(tk.END, f"Add: {a} + {b} = {res}\n")
@@ -162,6 +217,11 @@ class IEEE754GUI(tk.Tk):
             a, b = float(self.op_entry1.get()), float(self.op_entry2.get())
             if self.precision.get() == "32":
                 res = ops.multiply_floats(a, b)
+            elif self.precision.get() == "bf16":
+                res = convert.bits_to_float_bf16(convert.float_to_bits_bf16(ops.multiply_floats(a, b)))
+            elif self.precision.get() in convert.FP8_FORMATS:
+                fmt = self.precision.get()
+                res = convert.bits_to_float_fp8(convert.float_to_bits_fp8(ops.multiply_floats(a, b), fmt), fmt)
             else:
                 res = ops.multiply_floats_64(a, b)
             self.result_box.insert(tk.END, f"Multiply: {a} × {b} = {res}\n")
@@ -182,17 +242,21 @@ class IEEE754GUI(tk.Tk):
         if not binary:
             messagebox.showinfo("Info", "Please enter or convert a number first!")
             return
-        if self.precision.get() == "32":
-            s, e, m = binary[0], binary[1:9], binary[9:]
-        else:
-            s, e, m = binary[0], binary[1:12], binary[12:]
+        width, ebits, mbits, bias = self.current_layout()
+        try:
+            fields = self.decompose(convert.parse_ieee754(binary, width))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        e = format(fields.exponent, f"0{ebits}b")
+        m = format(fields.mantissa, f"0{mbits}b")
         self.learning_text.delete("1.0", tk.END)
         self.learning_text.insert(tk.END, "Step-by-Step Conversion:\n")
-        self.learning_text.insert(tk.END, f"1. Sign bit: {s} → {'Positive' if s=='0' else 'Negative'}\n")
-        self.learning_text.insert(tk.END, f"2. Exponent bits: {e} (biased)\n")
-        self.learning_text.insert(tk.END, f"3. Mantissa bits: {m}\n")
+        self.learning_text.insert(tk.END, f"1. Sign bit: {fields.sign} → {'Negative' if fields.sign else 'Positive'}\n")
+        self.learning_text.insert(tk.END, f"2. Exponent bits: {e} (biased {fields.exponent}, unbiased {fields.unbiased})\n")
+        self.learning_text.insert(tk.END, f"3. Mantissa bits: {m} ({fields.kind_name})\n")
         self.learning_text.insert(tk.END, "4. Reconstruct float using formula:\n")
-        self.learning_text.insert(tk.END, " (-1)^S × (1.M) × 2^(E-bias)\n")
+        self.learning_text.insert(tk.END, f" (-1)^S × (1.M) × 2^(E-bias), bias = {bias}\n")
 
 if __name__ == "__main__":
     app = IEEE754GUI()
@@ -0,0 +1,48 @@
+"""
+Microbenchmarks comparing the batch helpers in utils.py with the per-value
+f-string / int(x, 2) path used by convert.py, plus a byte-table baseline.
+
+Usage: python bench.py [count]
+"""
+
+import random
+import sys
+import timeit
+
+from utils import format_bits_batch, parse_bits_batch
+
+# Byte-lookup-table formatting/parsing, kept only as a baseline: both are slower
+# than the built-in f-string and int(x, 2) they were meant to replace.
+_BYTE_TO_BITS = tuple(f"{i:08b}" for i in range(256))
+_BITS_TO_BYTE = {bits: i for i, bits in enumerate(_BYTE_TO_BITS)}
+
+def table_format(bits: int, width: int) -> str:
+    table = _BYTE_TO_BITS
+    return "".join([table[b] for b in bits.to_bytes(width // 8, 'big')])
+
+def table_parse(binary: str) -> int:
+    table = _BITS_TO_BYTE
+    return int.from_bytes(bytes([table[binary[i:i + 8]] for i in range(0, len(binary), 8)]), 'big')
+
+def bench(label: str, func, repeat: int = 5) -> float:
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print(f"{label:<40} {best * 1e3:10.2f} ms")
+    return best
+
+def bench_bit_strings(count: int):
+    for width in (32, 64):
+        patterns = [random.getrandbits(width) for _ in range(count)]
+        fmt = f"0{width}b"
+        text = format_bits_batch(patterns, width)
+        lines = text.splitlines()
+        print(f"--- {width}-bit, {count:,} patterns ---")
+        bench("format: f-string per value", lambda: [format(p, fmt) for p in patterns])
+        bench("format: table per value", lambda: [table_format(p, width) for p in patterns])
+        bench("format: f-string + join", lambda: "\n".join([format(p, fmt) for p in patterns]) + "\n")
+        bench("format: batch", lambda: format_bits_batch(patterns, width))
+        bench("parse: int(x, 2) per value", lambda: [int(s, 2) for s in lines])
+        bench("parse: table per value", lambda: [table_parse(s) for s in lines])
+        bench("parse: batch", lambda: parse_bits_batch(text, width))
+
+if __name__ == "__main__":
+    bench_bit_strings(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
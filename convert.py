@@ -1,24 +1,828 @@
 """
 Module: convert.py
 
-Handles conversion between decimal and IEEE-754 32-bit and 64-bit binary representation.
+Handles conversion between decimal and IEEE-754 32-bit and 64-bit binary representation,
+plus half, bfloat16, FP8 and quad precision. Format constants come from formats.py.
 """
 
+import functools
+import array
+import math
 import struct
+import sys
+from decimal import Decimal
+from fractions import Fraction
+
+import formats
+from formats import FloatFormat, Fields, BINARY16, BFLOAT16, BINARY32, BINARY64, BINARY128, \
+                    CLASS_NAMES, ROUND_NEAREST_EVEN, format_for_width, convert_format
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed by the *_array batch functions
+    np = None
+
+# Precompiled codecs: reused on every call instead of reparsing the format string.
+_F32 = struct.Struct('!f')
+_U32 = struct.Struct('!I')
+_F64 = struct.Struct('!d')
+_U64 = struct.Struct('!Q')
+
+# --- Integer bit-pattern API ---
+def float_to_bits32(num: float) -> int:
+    return _U32.unpack(_F32.pack(num))[0]
+
+def bits_to_float32(bits: int) -> float:
+    return _F32.unpack(_U32.pack(bits))[0]
+
+def float_to_bits64(num: float) -> int:
+    return _U64.unpack(_F64.pack(num))[0]
+
+def bits_to_float64(bits: int) -> float:
+    return _F64.unpack(_U64.pack(bits))[0]
+
+# --- Opt-in memoization of the string conversions ---
+class ConversionCache(formats.LRUCache):
+    """LRU cache of string conversions keyed by (direction, width, pattern).
+
+    Floats are keyed by their float64 bit pattern rather than by value, so -0.0 and
+    0.0 get separate entries and NaNs (which never compare equal) are cached per payload.
+    """
+
+_CONVERSION_CACHE = None                                  # None while caching is switched off
+
+def enable_conversion_cache(maxsize: int = 1024) -> ConversionCache:
+    """Turn on caching for float_to_ieee754(_64) / ieee754_to_float(_64), or resize it."""
+    global _CONVERSION_CACHE
+    if _CONVERSION_CACHE is None:
+        _CONVERSION_CACHE = ConversionCache(maxsize)
+    else:
+        _CONVERSION_CACHE.resize(maxsize)
+    return _CONVERSION_CACHE
+
+def disable_conversion_cache():
+    global _CONVERSION_CACHE
+    _CONVERSION_CACHE = None
+
+def conversion_cache_info() -> dict:
+    """Counters of the active cache; {} while caching is off."""
+    return _CONVERSION_CACHE.info() if _CONVERSION_CACHE is not None else {}
+
+def _encode32(num: float) -> str:
+    return f"{float_to_bits32(num):032b}"
+
+def _decode32(binary: str) -> float:
+    return bits_to_float32(int(binary, 2))
+
+def _encode64(num: float) -> str:
+    return f"{float_to_bits64(num):064b}"
+
+def _decode64(binary: str) -> float:
+    return bits_to_float64(int(binary, 2))
 
 def float_to_ieee754(num: float) -> str:
-    bits = struct.unpack('!I', struct.pack('!f', num))[0]
-    return f"{bits:032b}"
+    cache = _CONVERSION_CACHE
+    if cache is None:
+        return f"{float_to_bits32(num):032b}"
+    return cache.lookup(('enc', 32, float_to_bits64(num)), _encode32, num)
 
 def ieee754_to_float(binary: str) -> float:
-    bits = int(binary, 2)
-    return struct.unpack('!f', struct.pack('!I', bits))[0]
+    cache = _CONVERSION_CACHE
+    if cache is None:
+        return bits_to_float32(int(binary, 2))
+    return cache.lookup(('dec', 32, binary), _decode32, binary)
 
 # --- NEW FUNCTIONS for 64-bit ---
 def float_to_ieee754_64(num: float) -> str:
-    bits = struct.unpack('!Q', struct.pack('!d', num))[0]
-    return f"{bits:064b}"
+    cache = _CONVERSION_CACHE
+    if cache is None:
+        return f"{float_to_bits64(num):064b}"
+    return cache.lookup(('enc', 64, float_to_bits64(num)), _encode64, num)
 
 def ieee754_to_float_64(binary: str) -> float:
-    bits = int(binary, 2)
-    return struct.unpack('!d', struct.pack('!Q', bits))[0]
+    cache = _CONVERSION_CACHE
+    if cache is None:
+        return bits_to_float64(int(binary, 2))
+    return cache.lookup(('dec', 64, binary), _decode64, binary)
+
+# --- Strict parsing of entered bit strings ---
+class BitStringError(ValueError):
+    """A malformed bit string; `column` is the 1-based position of the offending character."""
+
+    def __init__(self, message: str, column: int, line: int = None):
+        where = f"line {line}, column {column}" if line is not None else f"column {column}"
+        super().__init__(f"{where}: {message}")
+        self.column = column
+        self.line = line
+
+_DROP_SEPARATORS = str.maketrans('', '', '_ ')
+_DROP_VALID = str.maketrans('', '', '01_ ')
+
+def _scan_bits(text: str, width: int, line: int = None):
+    """Return the pattern in `text`, or a BitStringError describing the first problem."""
+    body = text.lstrip()
+    offset = len(text) - len(body)
+    body = body.rstrip()
+    if body[:2] in ('0b', '0B'):
+        body, offset = body[2:], offset + 2
+    digits = body.translate(_DROP_SEPARATORS)
+    if len(digits) == width and not body.translate(_DROP_VALID) \
+            and body[:1] not in ('_', ' ') and body[-1:] not in ('_', ' '):
+        return int(digits, 2)
+    count = 0
+    for i, ch in enumerate(body):
+        if ch in '01':
+            count += 1
+            if count > width:
+                return BitStringError(f"too many bits; expected {width}", offset + i + 1, line)
+        elif ch not in '_ ' or i == 0 or i == len(body) - 1:
+            return BitStringError(f"unexpected character {ch!r}", offset + i + 1, line)
+    return BitStringError(f"too few bits: got {count}, expected {width}", offset + len(body) + 1, line)
+
+def parse_ieee754(text: str, width: int = 32) -> int:
+    """Strictly parse a `width`-bit pattern, allowing a 0b prefix and '_'/' ' group separators."""
+    result = _scan_bits(text, width)
+    if isinstance(result, BitStringError):
+        raise result
+    return result
+
+def parse_ieee754_lines(lines, width: int = 32) -> tuple:
+    """Validate many patterns in one pass without raising.
+
+    Returns (patterns, errors): `patterns` has one entry per input line (None for
+    blank or invalid lines) and `errors` lists a BitStringError for each bad line.
+    """
+    patterns, errors = [], []
+    for lineno, text in enumerate(lines, 1):
+        text = text.rstrip('\r\n')
+        if not text.strip():
+            patterns.append(None)
+            continue
+        result = _scan_bits(text, width, lineno)
+        if isinstance(result, BitStringError):
+            errors.append(result)
+            result = None
+        patterns.append(result)
+    return patterns, errors
+
+def parse_ieee754_file(path, width: int = 32) -> tuple:
+    with open(path, 'r') as fh:
+        return parse_ieee754_lines(fh, width)
+
+# --- Buffer-protocol decoding ---
+# width -> (pattern typecode, float typecode)
+_LAYOUT = {32: ('I', 'f'), 64: ('Q', 'd')}
+_ORDER_PREFIX = {'big': '>', 'little': '<'}
+
+def check_byteorder(byteorder: str):
+    if byteorder not in _ORDER_PREFIX:
+        raise ValueError(f"byteorder must be 'big' or 'little', not {byteorder!r}")
+
+def _cast_buffer(buf, width: int, byteorder: str, float_view: bool):
+    """Yield the values packed in `buf`, casting in place when the byte order is native."""
+    if width not in _LAYOUT:
+        raise ValueError(f"unsupported width {width}; expected 32 or 64")
+    check_byteorder(byteorder)
+    raw = memoryview(buf).cast('B')
+    if len(raw) % (width // 8):
+        raise ValueError(f"buffer length {len(raw)} is not a multiple of {width // 8} bytes")
+    bits_code, float_code = _LAYOUT[width]
+    code = float_code if float_view else bits_code
+    if byteorder == sys.byteorder:
+        return iter(raw.cast(code))
+    return (v for (v,) in struct.iter_unpack(_ORDER_PREFIX[byteorder] + code, raw))
+
+def buffer_to_bits(buf, width: int = 32, byteorder: str = 'big'):
+    return _cast_buffer(buf, width, byteorder, float_view=False)
+
+def buffer_to_floats(buf, width: int = 32, byteorder: str = 'big'):
+    return _cast_buffer(buf, width, byteorder, float_view=True)
+
+def buffer_to_fields(buf, width: int = 32, byteorder: str = 'big'):
+    """Yield (sign, biased exponent, mantissa) integer triples for each packed value."""
+    values = _cast_buffer(buf, width, byteorder, float_view=False)
+    return map(format_for_width(width).fields, values)
+
+def split_ieee754(binary: str) -> tuple:
+    """Split a 16/32/64/128-character pattern into its (sign, exponent, mantissa) substrings."""
+    return format_for_width(len(binary)).split(binary)
+
+# --- Batch (NumPy) conversion ---
+def require_numpy():
+    if np is None:
+        raise ImportError("numpy is required for array conversion")
+
+def bits_array_to_strings(patterns, width: int):
+    """Render an unsigned pattern array as a fixed-width S<width> array of '0'/'1' bytes."""
+    require_numpy()
+    big = np.ascontiguousarray(patterns, dtype=f'>u{width // 8}')
+    digits = np.unpackbits(big.view(np.uint8))
+    digits += ord('0')
+    return digits.view(f'S{width}').reshape(big.shape)
+
+def strings_array_to_bits(strings, width: int):
+    """Parse an array of '0'/'1' strings of exactly `width` characters into an unsigned pattern array."""
+    require_numpy()
+    strings = np.asarray(strings)
+    if strings.dtype.kind in 'SU':
+        lengths = np.char.str_len(strings)
+        bad = np.flatnonzero(lengths != width)
+        if bad.size:
+            raise ValueError(f"expected {width}-bit strings, got {int(lengths.flat[bad[0]])} characters "
+                             f"at index {int(bad[0])}")
+    raw = np.ascontiguousarray(strings, dtype=f'S{width}').view(np.uint8).reshape(-1, width)
+    digits = raw - ord('0')
+    if digits.size and digits.max() > 1:
+        raise ValueError("bit strings may only contain '0' and '1'")
+    packed = np.packbits(digits, axis=1)
+    return packed.view(f'>u{width // 8}').reshape(np.shape(strings)).astype(f'u{width // 8}')
+
+def float_to_ieee754_array(values, as_strings: bool = False):
+    require_numpy()
+    bits = np.asarray(values, dtype=np.float32).view(np.uint32)
+    return bits_array_to_strings(bits, 32) if as_strings else bits
+
+def ieee754_to_float_array(patterns):
+    require_numpy()
+    patterns = np.asarray(patterns)
+    if patterns.dtype.kind in 'SU':
+        patterns = strings_array_to_bits(patterns, 32)
+    return np.ascontiguousarray(patterns, dtype=np.uint32).view(np.float32)
+
+def float_to_ieee754_64_array(values, as_strings: bool = False):
+    require_numpy()
+    bits = np.asarray(values, dtype=np.float64).view(np.uint64)
+    return bits_array_to_strings(bits, 64) if as_strings else bits
+
+def ieee754_to_float_64_array(patterns):
+    require_numpy()
+    patterns = np.asarray(patterns)
+    if patterns.dtype.kind in 'SU':
+        patterns = strings_array_to_bits(patterns, 64)
+    return np.ascontiguousarray(patterns, dtype=np.uint64).view(np.float64)
+
+# --- binary16 (half precision) ---
+def _build_narrowing_table(src: FloatFormat, dst: FloatFormat) -> tuple:
+    """Per `src` exponent: (`dst` base pattern, right shift of the significand), or None."""
+    shift = src.mbits - dst.mbits
+    table = []
+    for e in range(src.exp_max + 1):
+        unbiased = e - src.bias
+        if e == 0 or unbiased < dst.emin - dst.mbits - 1:
+            table.append((0, None))                       # rounds to signed zero
+        elif e == src.exp_max or unbiased > dst.emax:
+            table.append(None)                            # inf/NaN or overflow
+        elif unbiased >= dst.emin:
+            table.append(((unbiased + dst.bias) << dst.mbits, shift))   # normal: no hidden bit
+        else:
+            table.append((0, shift + dst.emin - unbiased))              # subnormal: hidden bit shifted in
+    return tuple(table)
+
+_HALF_ENCODE = _build_narrowing_table(BINARY64, BINARY16)
+_HALF_DECODE = None
+
+def _half_decode_table() -> tuple:
+    global _HALF_DECODE
+    if _HALF_DECODE is None:
+        raw = struct.pack('<65536H', *range(65536))
+        _HALF_DECODE = tuple(v for (v,) in struct.iter_unpack('<e', raw))
+    return _HALF_DECODE
+
+def float_to_bits16(num: float) -> int:
+    bits = float_to_bits64(num)
+    sign = (bits >> 48) & 0x8000
+    exp = (bits >> 52) & 0x7FF
+    mant = bits & 0xFFFFFFFFFFFFF
+    entry = _HALF_ENCODE[exp]
+    if entry is None:
+        if exp == 2047 and mant:
+            return sign | 0x7E00 | (mant >> 42)           # quiet NaN, keep the top payload bits
+        return sign | 0x7C00
+    base, shift = entry
+    if shift is None:
+        return sign
+    if shift > 42:
+        mant |= 1 << 52
+    result = base + (mant >> shift)
+    rem = mant & ((1 << shift) - 1)
+    half = 1 << (shift - 1)
+    if rem > half or (rem == half and result & 1):
+        result += 1                                       # may carry into the exponent, up to inf
+    return sign | result
+
+def bits_to_float16(bits: int) -> float:
+    return _half_decode_table()[bits]
+
+def float_to_ieee754_16(num: float) -> str:
+    return f"{float_to_bits16(num):016b}"
+
+def ieee754_to_float_16(binary: str) -> float:
+    return bits_to_float16(int(binary, 2))
+
+def float_to_ieee754_16_array(values, as_strings: bool = False):
+    require_numpy()
+    with np.errstate(over='ignore'):                      # overflow rounds to inf, as in the scalar path
+        bits = np.asarray(values, dtype=np.float64).astype(np.float16).view(np.uint16)
+    return bits_array_to_strings(bits, 16) if as_strings else bits
+
+def ieee754_to_float_16_array(patterns):
+    """Decode half patterns to float32 through the precomputed 65,536-entry table."""
+    require_numpy()
+    patterns = np.asarray(patterns)
+    if patterns.dtype.kind in 'SU':
+        patterns = strings_array_to_bits(patterns, 16)
+    return _half_decode_array()[np.asarray(patterns, dtype=np.uint16)]
+
+_HALF_DECODE_ARRAY = None
+
+def _half_decode_array():
+    global _HALF_DECODE_ARRAY
+    if _HALF_DECODE_ARRAY is None:
+        _HALF_DECODE_ARRAY = np.arange(65536, dtype=np.uint16).view(np.float16).astype(np.float32)
+    return _HALF_DECODE_ARRAY
+
+# --- bfloat16 (upper half of a float32 pattern) ---
+def bits32_to_bf16(bits: int) -> int:
+    """Round a float32 pattern to bfloat16 (round to nearest even, NaNs kept quiet)."""
+    if bits & 0x7FFFFFFF > 0x7F800000:
+        return (bits >> 16) | 0x0040
+    return (bits + 0x7FFF + ((bits >> 16) & 1)) >> 16
+
+def bf16_to_bits32(bits: int) -> int:
+    return bits << 16
+
+def float_to_bits_bf16(num: float) -> int:
+    # round once from the float64 pattern; going through float32 would round twice
+    return convert_format(float_to_bits64(num), BINARY64, BFLOAT16)
+
+def bits_to_float_bf16(bits: int) -> float:
+    return bits_to_float32(bits << 16)
+
+def float_to_ieee754_bf16(num: float) -> str:
+    return f"{float_to_bits_bf16(num):016b}"
+
+def ieee754_to_float_bf16(binary: str) -> float:
+    return bits_to_float_bf16(int(binary, 2))
+
+def bits32_to_bf16_array(patterns):
+    require_numpy()
+    bits = np.asarray(patterns, dtype=np.uint32)
+    nan = (bits & np.uint32(0x7FFFFFFF)) > np.uint32(0x7F800000)
+    rounded = (bits + (np.uint32(0x7FFF) + ((bits >> 16) & np.uint32(1)))) >> 16
+    return np.where(nan, (bits >> 16) | np.uint32(0x0040), rounded).astype(np.uint16)
+
+def float_to_ieee754_bf16_array(values, as_strings: bool = False):
+    require_numpy()
+    bits64 = np.asarray(values, dtype=np.float64).view(np.uint64)
+    bits = _narrow_64_array(bits64, BFLOAT16, ROUND_NEAREST_EVEN).astype(np.uint16)
+    return bits_array_to_strings(bits, 16) if as_strings else bits
+
+def ieee754_to_float_bf16_array(patterns):
+    require_numpy()
+    patterns = np.asarray(patterns)
+    if patterns.dtype.kind in 'SU':
+        patterns = strings_array_to_bits(patterns, 16)
+    return (np.asarray(patterns, dtype=np.uint32) << 16).view(np.float32)
+
+# --- OCP FP8 (E4M3 / E5M2) ---
+# E4M3 has no infinities and a single NaN magnitude (0x7F), so its all-ones exponent
+# holds finite values and IEEE semantics don't apply: only its bit layout is given.
+# E5M2 follows the IEEE layout and rules, so 'format' is a full FloatFormat for it.
+FP8_FORMATS = {
+    'e4m3': {'ebits': 4, 'mbits': 3, 'bias': 7, 'max': 0x7E, 'nan': 0x7F, 'inf': None,
+             'format': None},
+    'e5m2': {'ebits': 5, 'mbits': 2, 'bias': 15, 'max': 0x7B, 'nan': 0x7E, 'inf': 0x7C,
+             'format': FloatFormat.get(5, 2)},
+}
+_FP8_DECODE = {}
+
+def _fp8_spec(fmt: str) -> dict:
+    try:
+        return FP8_FORMATS[fmt]
+    except KeyError:
+        raise ValueError(f"unknown FP8 format {fmt!r}; expected one of {sorted(FP8_FORMATS)}") from None
+
+def _fp8_decode_table(fmt: str) -> tuple:
+    table = _FP8_DECODE.get(fmt)
+    if table is None:
+        spec = _fp8_spec(fmt)
+        mbits, bias = spec['mbits'], spec['bias']
+        values = []
+        for bits in range(256):
+            sign = -1.0 if bits & 0x80 else 1.0
+            mag = bits & 0x7F
+            exp, mant = mag >> mbits, mag & ((1 << mbits) - 1)
+            if mag == spec['inf']:
+                values.append(sign * math.inf)
+            elif mag > spec['max']:
+                values.append(math.nan)
+            elif exp == 0:
+                values.append(sign * math.ldexp(mant, 1 - bias - mbits))
+            else:
+                values.append(sign * math.ldexp(mant | (1 << mbits), exp - bias - mbits))
+        table = _FP8_DECODE[fmt] = tuple(values)
+    return table
+
+def _fp8_overflow(spec: dict, saturate: bool) -> int:
+    if saturate:
+        return spec['max']
+    return spec['nan'] if spec['inf'] is None else spec['inf']
+
+def float_to_bits_fp8(num: float, fmt: str = 'e4m3', saturate: bool = False) -> int:
+    """Round to the nearest FP8 value (ties to even).
+
+    Finite overflow gives the largest finite value when `saturate` is set, and
+    otherwise infinity (E5M2) or NaN (E4M3, which has no infinity).
+    """
+    spec = _fp8_spec(fmt)
+    sign = 0x80 if math.copysign(1.0, num) < 0 else 0
+    if num != num:
+        return sign | spec['nan']
+    if math.isinf(num):
+        if spec['inf'] is not None:
+            return sign | spec['inf']
+        return sign | _fp8_overflow(spec, saturate)
+    mbits, bias = spec['mbits'], spec['bias']
+    exp = max(math.frexp(num)[1] - 1, 1 - bias)
+    q = round(math.ldexp(abs(num), mbits - exp))          # significand incl. hidden bit, ties to even
+    if q >> (mbits + 1):
+        q >>= 1
+        exp += 1
+    mag = ((exp + bias) << mbits | (q - (1 << mbits))) if q >> mbits else q
+    if mag > spec['max']:
+        mag = _fp8_overflow(spec, saturate)
+    return sign | mag
+
+def bits_to_float_fp8(bits: int, fmt: str = 'e4m3') -> float:
+    return _fp8_decode_table(fmt)[bits]
+
+def float_to_ieee754_fp8(num: float, fmt: str = 'e4m3', saturate: bool = False) -> str:
+    return f"{float_to_bits_fp8(num, fmt, saturate):08b}"
+
+def ieee754_to_float_fp8(binary: str, fmt: str = 'e4m3') -> float:
+    return bits_to_float_fp8(int(binary, 2), fmt)
+
+def split_fp8(binary: str, fmt: str = 'e4m3') -> tuple:
+    ebits = _fp8_spec(fmt)['ebits']
+    if len(binary) != 8:
+        raise ValueError(f"expected a 8 bit pattern, got {len(binary)} bits")
+    return binary[0], binary[1:1 + ebits], binary[1 + ebits:]
+
+def fp8_fields(bits: int, fmt: str = 'e4m3') -> Fields:
+    """Decompose an FP8 pattern, classifying it by the format's own NaN/infinity encodings."""
+    spec = _fp8_spec(fmt)
+    mbits, bias = spec['mbits'], spec['bias']
+    mag = bits & 0x7F
+    exp, mant = mag >> mbits, mag & ((1 << mbits) - 1)
+    if mag == spec['inf']:
+        kind = formats.INFINITY
+    elif mag > spec['max']:
+        kind = formats.QUIET_NAN if mant >> (mbits - 1) else formats.SIGNALING_NAN
+    elif exp:
+        kind = formats.NORMAL
+    else:
+        kind = formats.SUBNORMAL if mant else formats.ZERO
+    return Fields(bits >> 7, exp, exp - bias if exp else 1 - bias, mant, kind)
+
+def float_to_ieee754_fp8_array(values, fmt: str = 'e4m3', saturate: bool = False, as_strings: bool = False):
+    require_numpy()
+    spec = _fp8_spec(fmt)
+    mbits, bias = spec['mbits'], spec['bias']
+    x = np.asarray(values, dtype=np.float64)
+    sign = np.signbit(x).astype(np.uint8) << np.uint8(7)
+    a = np.abs(x)
+    finite = np.isfinite(a)
+    a = np.where(finite, a, 0.0)
+    exp = np.maximum(np.frexp(a)[1] - 1, 1 - bias)
+    q = np.rint(np.ldexp(a, mbits - exp)).astype(np.int64)
+    carry = q >> (mbits + 1)
+    q >>= carry
+    exp = exp + carry
+    normal = (q >> mbits) > 0
+    mag = np.where(normal, ((exp + bias) << mbits) | (q - (1 << mbits)), q)
+    mag = np.where(mag > spec['max'], _fp8_overflow(spec, saturate), mag)
+    if spec['inf'] is not None:
+        mag = np.where(np.isinf(x), spec['inf'], mag)
+    else:
+        mag = np.where(np.isinf(x), _fp8_overflow(spec, saturate), mag)
+    mag = np.where(np.isnan(x), spec['nan'], mag)
+    bits = sign | mag.astype(np.uint8)
+    return bits_array_to_strings(bits, 8) if as_strings else bits
+
+def ieee754_to_float_fp8_array(patterns, fmt: str = 'e4m3'):
+    require_numpy()
+    patterns = np.asarray(patterns)
+    if patterns.dtype.kind in 'SU':
+        patterns = strings_array_to_bits(patterns, 8)
+    table = np.array(_fp8_decode_table(fmt), dtype=np.float32)
+    return table[np.asarray(patterns, dtype=np.uint8)]
+
+# --- binary128 (quad precision) via exact integer arithmetic ---
+def value_to_bits128(value) -> int:
+    """Correctly rounded binary128 pattern of an int, float, Fraction, Decimal or decimal string."""
+    return BINARY128.encode(value)
+
+def bits128_to_fraction(bits: int) -> Fraction:
+    return BINARY128.decode_exact(bits)
+
+def bits128_to_decimal(bits: int, digits: int = None) -> Decimal:
+    """Exact (or `digits`-significant-digit, correctly rounded) decimal value of a binary128 pattern."""
+    return BINARY128.to_decimal(bits, digits)
+
+def value_to_ieee754_128(value) -> str:
+    return BINARY128.to_string(value_to_bits128(value))
+
+def ieee754_128_to_fraction(binary: str) -> Fraction:
+    return bits128_to_fraction(int(binary, 2))
+
+def ieee754_128_to_decimal(binary: str, digits: int = None) -> Decimal:
+    return bits128_to_decimal(int(binary, 2), digits)
+
+# --- C99 hexadecimal floats ---
+def _hex_format(width: int) -> FloatFormat:
+    if width not in (32, 64):
+        raise ValueError(f"unsupported width {width}; expected 32 or 64")
+    return format_for_width(width)
+
+def bits_to_hexfloat(bits: int, width: int = 32) -> str:
+    return _hex_format(width).to_hex(bits)
+
+def hexfloat_to_bits(text: str, width: int = 32) -> int:
+    return _hex_format(width).from_hex(text)
+
+def float_to_hexfloat(num: float, width: int = 32) -> str:
+    bits = float_to_bits32(num) if width == 32 else float_to_bits64(num)
+    return bits_to_hexfloat(bits, width)
+
+def hexfloat_to_float(text: str, width: int = 32) -> float:
+    bits = hexfloat_to_bits(text, width)
+    return bits_to_float32(bits) if width == 32 else bits_to_float64(bits)
+
+_HEX_CHARS = b"0123456789abcdef"
+
+def bits_to_hexfloat_array(patterns, width: int = 32):
+    """Vectorized bits_to_hexfloat: returns a NumPy unicode array of hex float strings."""
+    require_numpy()
+    fmt = _hex_format(width)
+    bits = np.asarray(patterns, dtype=f'u{width // 8}').astype(np.uint64)
+    sign = (bits >> np.uint64(width - 1)).astype(bool)
+    exp = ((bits >> np.uint64(fmt.mbits)) & np.uint64(fmt.exp_max)).astype(np.int64)
+    mant = (bits & np.uint64(fmt.mant_mask)) << np.uint64(fmt.hex_pad)
+    shifts = np.arange(fmt.hex_digits - 1, -1, -1, dtype=np.uint64) * np.uint64(4)
+    nibbles = (mant[..., None] >> shifts) & np.uint64(0xF)
+    chars = np.frombuffer(_HEX_CHARS, dtype=np.uint8)[nibbles]
+    digits = np.char.rstrip(np.ascontiguousarray(chars).view(f'S{fmt.hex_digits}')[..., 0], b'0').astype('U')
+    lead = np.where(exp == 0, '0x0', '0x1')
+    dot = np.where(digits == '', '', '.')
+    power = np.char.mod('p%+d', np.where(exp == 0, fmt.emin, exp - fmt.bias))
+    text = np.char.add(np.char.add(np.char.add(lead, dot), digits), power)
+    text = np.where((exp == 0) & (mant == 0), '0x0p+0', text)
+    text = np.where(exp == fmt.exp_max, np.where(mant == 0, 'inf', 'nan'), text)
+    nan = (exp == fmt.exp_max) & (mant != 0)
+    return np.where(sign & ~nan, np.char.add('-', text), text)
+
+def hexfloat_to_bits_array(strings, width: int = 32):
+    require_numpy()
+    fmt = _hex_format(width)
+    strings = np.asarray(strings)
+    dtype = np.uint32 if width == 32 else np.uint64
+    return np.fromiter(map(fmt.from_hex, strings.ravel().tolist()), dtype=dtype, count=strings.size).reshape(strings.shape)
+
+# --- Bulk byte codec for wire formats ---
+@functools.lru_cache(maxsize=64)
+def _bulk_struct(byteorder: str, count: int, code: str) -> struct.Struct:
+    check_byteorder(byteorder)
+    return struct.Struct(f"{_ORDER_PREFIX[byteorder]}{count}{code}")
+
+def _bulk_code(width: int, float_view: bool) -> str:
+    if width not in _LAYOUT:
+        raise ValueError(f"unsupported width {width}; expected 32 or 64")
+    return _LAYOUT[width][1 if float_view else 0]
+
+def _dtype(width: int, byteorder: str, float_view: bool) -> str:
+    check_byteorder(byteorder)
+    return f"{_ORDER_PREFIX[byteorder]}{'f' if float_view else 'u'}{width // 8}"
+
+def _pack_bulk(values, width: int, byteorder: str, float_view: bool) -> bytes:
+    code = _bulk_code(width, float_view)
+    if np is not None and isinstance(values, np.ndarray):
+        return values.astype(_dtype(width, byteorder, float_view), copy=False).tobytes()
+    if not isinstance(values, (list, tuple)):
+        values = list(values)
+    try:
+        return _bulk_struct(byteorder, len(values), code).pack(*values)
+    except OverflowError:
+        # struct refuses floats beyond the float32 range; cast like the ndarray path so they pack as inf
+        if np is None:
+            raise
+        return np.array(values, dtype=_dtype(width, byteorder, float_view)).tobytes()
+
+def _unpack_bulk(buf, width: int, byteorder: str, float_view: bool, as_array: bool):
+    code = _bulk_code(width, float_view)
+    size = width // 8
+    nbytes = memoryview(buf).nbytes
+    if nbytes % size:
+        raise ValueError(f"buffer length {nbytes} is not a multiple of {size} bytes")
+    if as_array:
+        require_numpy()
+        return np.frombuffer(buf, dtype=_dtype(width, byteorder, float_view))
+    return _bulk_struct(byteorder, nbytes // size, code).unpack_from(buf)
+
+def floats_to_bytes(values, width: int = 32, byteorder: str = 'little') -> bytes:
+    """Pack a list or NumPy array of floats into one contiguous buffer.
+
+    At width 32, values beyond the float32 range pack as infinities, as a NumPy cast
+    would; without NumPy a list holding such a value raises OverflowError instead.
+    """
+    return _pack_bulk(values, width, byteorder, float_view=True)
+
+def bytes_to_floats(buf, width: int = 32, byteorder: str = 'little', as_array: bool = False):
+    """Unpack a whole buffer in one call: a tuple of floats, or a zero-copy NumPy view."""
+    return _unpack_bulk(buf, width, byteorder, float_view=True, as_array=as_array)
+
+def bits_to_bytes(patterns, width: int = 32, byteorder: str = 'little') -> bytes:
+    return _pack_bulk(patterns, width, byteorder, float_view=False)
+
+def bytes_to_bits(buf, width: int = 32, byteorder: str = 'little', as_array: bool = False):
+    return _unpack_bulk(buf, width, byteorder, float_view=False, as_array=as_array)
+
+# --- Field decomposition in bulk ---
+_FIELD_NAMES = ("sign", "exponent", "unbiased", "mantissa", "kind")
+
+def bits_to_fields(bits: int, width: int = 32) -> Fields:
+    return format_for_width(width).decompose(bits)
+
+def fields_array(patterns, width: int = 32):
+    """Decompose many patterns at once.
+
+    Returns a NumPy structured array with fields sign, exponent, unbiased, mantissa
+    and kind (see formats.CLASS_NAMES); without NumPy, a dict of parallel array.arrays.
+    """
+    if width not in (16, 32, 64):
+        raise ValueError(f"unsupported width {width}; expected 16, 32 or 64")
+    fmt = format_for_width(width)
+    if np is None:
+        columns = {name: array.array(code) for name, code in zip(_FIELD_NAMES, 'BHhQB')}
+        for bits in patterns:
+            for name, value in zip(_FIELD_NAMES, fmt.decompose(bits)):
+                columns[name].append(value)
+        return columns
+    utype = np.dtype(f'u{width // 8}')
+    bits = np.asarray(patterns, dtype=utype)
+    exp = (bits >> utype.type(fmt.mbits)) & utype.type(fmt.exp_max)
+    mant = bits & utype.type(fmt.mant_mask)
+    out = np.empty(bits.shape, dtype=[('sign', 'u1'), ('exponent', 'u2'), ('unbiased', 'i2'),
+                                      ('mantissa', utype), ('kind', 'u1')])
+    out['sign'] = bits >> utype.type(fmt.sign_shift)
+    out['exponent'] = exp
+    out['unbiased'] = np.where(exp == 0, fmt.emin, exp.astype(np.int32) - fmt.bias)
+    out['mantissa'] = mant
+    out['kind'] = _class_index(bits, fmt)
+    return out
+
+# --- Classification and special-value census ---
+CENSUS_CHUNK = 1 << 20
+
+def pattern_array(patterns, width: int):
+    """View float arrays as their patterns; coerce anything else to the unsigned dtype."""
+    utype = np.dtype(f'u{width // 8}')
+    arr = np.asarray(patterns)
+    if arr.dtype.kind == 'f':
+        if arr.dtype.itemsize != utype.itemsize:
+            raise ValueError(f"{arr.dtype} array does not hold {width}-bit patterns")
+        return arr.view(utype)
+    return arr.astype(utype, copy=False)
+
+def _class_index(bits, fmt: FloatFormat):
+    """Kind of each pattern through a 16-entry table indexed by four mask tests."""
+    t = bits.dtype.type
+    exp = bits & t(fmt.exp_mask)
+    idx = (exp == 0).view(np.uint8)
+    idx = idx | ((exp == t(fmt.exp_mask)).view(np.uint8) << 1)
+    idx |= ((bits & t(fmt.mant_mask)) != 0).view(np.uint8) << 2
+    idx |= ((bits & t(1 << (fmt.mbits - 1))) != 0).view(np.uint8) << 3
+    return _CLASS_TABLE[idx]
+
+def _build_class_table():
+    table = []
+    for idx in range(16):
+        zero_exp, max_exp, mant, quiet = idx & 1, idx & 2, idx & 4, idx & 8
+        if max_exp:
+            table.append(formats.INFINITY if not mant else
+                         formats.QUIET_NAN if quiet else formats.SIGNALING_NAN)
+        elif zero_exp:
+            table.append(formats.SUBNORMAL if mant else formats.ZERO)
+        else:
+            table.append(formats.NORMAL)
+    return table
+
+_CLASS_TABLE = np.array(_build_class_table(), dtype=np.uint8) if np is not None else None
+
+def classify_array(patterns, width: int = 32):
+    """Class code (formats.CLASS_NAMES) of every pattern or float in the array."""
+    require_numpy()
+    return _class_index(pattern_array(patterns, width), format_for_width(width))
+
+def census(patterns, width: int = 32) -> dict:
+    """Count values per class and sign: {'normal': {'+': n, '-': m}, ...}.
+
+    NumPy arrays are scanned in CENSUS_CHUNK-sized slices so temporaries stay small;
+    other iterables fall back to FloatFormat.decompose, with Python floats first
+    rounded to `width` bits.
+    """
+    fmt = format_for_width(width)
+    counts = [0] * (2 * len(CLASS_NAMES))
+    if np is not None and isinstance(patterns, np.ndarray):
+        bits = pattern_array(patterns, width).ravel()
+        sign_shift = bits.dtype.type(fmt.sign_shift)
+        total = np.zeros(len(counts), dtype=np.int64)
+        for start in range(0, bits.size, CENSUS_CHUNK):
+            chunk = bits[start:start + CENSUS_CHUNK]
+            key = _class_index(chunk, fmt) << 1 | (chunk >> sign_shift).astype(np.uint8)
+            total += np.bincount(key, minlength=len(counts))
+        counts = total.tolist()
+    else:
+        for bits in patterns:
+            fields = fmt.decompose(fmt.encode(bits) if isinstance(bits, float) else bits)
+            counts[fields.kind * 2 + fields.sign] += 1
+    return {name: {'+': counts[2 * i], '-': counts[2 * i + 1]} for i, name in enumerate(CLASS_NAMES)}
+
+# --- Bit-exact 32 <-> 64 conversion on patterns ---
+def widen_32_to_64(bits: int) -> int:
+    """Exact float32 -> float64 pattern conversion; NaN payloads (and signaling NaNs) survive."""
+    exp = (bits >> 23) & 0xFF
+    if 0 < exp < 0xFF:
+        return (bits >> 31) << 63 | (exp + 896) << 52 | (bits & 0x7FFFFF) << 29
+    return convert_format(bits, BINARY32, BINARY64)
+
+def narrow_64_to_32(bits: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    """float64 -> float32 pattern conversion rounded in `rounding` (see formats.ROUNDING_MODES)."""
+    exp = (bits >> 52) & 0x7FF
+    if rounding == ROUND_NEAREST_EVEN and 897 <= exp <= 1150:
+        mant = bits & 0xFFFFFFFFFFFFF
+        result = (bits >> 32) & 0x80000000 | ((exp - 896) << 23 | mant >> 29)
+        rem = mant & 0x1FFFFFFF
+        if rem > 0x10000000 or (rem == 0x10000000 and result & 1):
+            result += 1                                   # a carry out of the mantissa bumps the exponent
+        return result
+    formats.check_rounding(rounding)
+    return convert_format(bits, BINARY64, BINARY32, rounding)
+
+def widen_32_to_64_array(patterns):
+    require_numpy()
+    bits = pattern_array(patterns, 32).astype(np.uint64)
+    u = np.uint64
+    sign = (bits >> u(31)) << u(63)
+    exp = (bits >> u(23)) & u(0xFF)
+    mant = bits & u(0x7FFFFF)
+    normal = (exp + u(896)) << u(52) | mant << u(29)
+    special = u(0x7FF) << u(52) | mant << u(29)
+    # subnormals become normal: move the leading one into the hidden bit
+    lead = (np.frexp(mant.astype(np.float64))[1] - 1).astype(np.int64)
+    lead_u = np.clip(lead, 0, 52).astype(np.uint64)
+    sub = (lead + (1023 - 149)).clip(0).astype(np.uint64) << u(52) | ((mant << (u(52) - lead_u)) & u(0xFFFFFFFFFFFFF))
+    out = np.where(exp == u(0xFF), special, np.where(exp == 0, np.where(mant == 0, u(0), sub), normal))
+    return sign | out
+
+def _round_up_array(rounding: str, sign, kept, rem, half):
+    if rounding == formats.ROUND_NEAREST_EVEN:
+        return (rem > half) | ((rem == half) & ((kept & np.uint64(1)) == 1))
+    if rounding == formats.ROUND_NEAREST_AWAY:
+        return rem >= half
+    if rounding == formats.ROUND_TOWARD_ZERO:
+        return np.zeros(rem.shape, dtype=bool)
+    negative = sign != 0
+    return (rem != 0) & (~negative if rounding == formats.ROUND_UPWARD else negative)
+
+def _narrow_64_array(bits, dst: FloatFormat, rounding: str):
+    """Round float64 patterns (uint64 array) to a narrower format; returns uint64 patterns."""
+    u = np.uint64
+    drop = 52 - dst.mbits
+    sign = bits >> u(63)
+    exp = ((bits >> u(52)) & u(0x7FF)).astype(np.int64)
+    mant = bits & u(0xFFFFFFFFFFFFF)
+    unbiased = exp - 1023
+    # significand incl. hidden bit, shifted right so its last kept bit is dst's
+    sig = np.where(exp == 0, mant, mant | u(1 << 52))
+    shift = np.where(unbiased >= dst.emin, drop, drop + dst.emin - unbiased).clip(drop, 54)
+    shift = np.where(exp == 0, 54, shift).astype(np.uint64)
+    kept = sig >> shift
+    rem = sig & ((u(1) << shift) - u(1))
+    half = u(1) << (shift - u(1))
+    kept = kept + _round_up_array(rounding, sign, kept, rem, half).astype(np.uint64)
+    # normal results: hidden bit dropped, biased exponent added (a rounding carry rolls into it)
+    biased = np.clip(unbiased + dst.bias, 1, dst.exp_max - 1).astype(np.uint64)
+    normal = (biased << u(dst.mbits)) + (kept - u(dst.hidden_bit))
+    result = np.where(unbiased >= dst.emin, normal, kept)
+    overflow = np.array([formats.overflow_bits(dst, s, rounding) & dst.abs_mask for s in (0, 1)],
+                        dtype=np.uint64)[sign.astype(np.intp)]
+    result = np.where((unbiased > dst.emax) | (result >= u(dst.inf_bits)), overflow, result)
+    nan_payload = mant >> u(drop)
+    nan = u(dst.inf_bits) | np.where(nan_payload == 0, u(1), nan_payload)
+    result = np.where(exp == 0x7FF, np.where(mant == 0, u(dst.inf_bits), nan), result)
+    return sign << u(dst.sign_shift) | result
+
+def narrow_64_to_32_array(patterns, rounding: str = ROUND_NEAREST_EVEN):
+    require_numpy()
+    formats.check_rounding(rounding)
+    return _narrow_64_array(pattern_array(patterns, 64), BINARY32, rounding).astype(np.uint32)
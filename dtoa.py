@@ -0,0 +1,106 @@
+"""
+Module: dtoa.py
+
+Shortest round-trip decimal output for float32 and narrower formats; wider
+FloatFormats (e.g. binary128) work too, drawing large powers from formats.POWER_CACHE.
+
+Follows Ryu: the rounding interval around the value is scaled by a power of ten
+chosen up front, then trailing digits are removed while the interval still
+contains a shorter decimal. Scaling uses exact integers with precomputed power
+tables, so the result is always the shortest correctly rounded string.
+"""
+
+from formats import BINARY32, FloatFormat, pow10
+
+# 10**k for every exponent float32 and narrower formats need; wider ones use the shared cache
+_POW10 = tuple(10 ** k for k in range(64))
+
+def _pow10(k: int) -> int:
+    return _POW10[k] if k < 64 else pow10(k)
+
+def shortest_digits(bits: int, fmt: FloatFormat = BINARY32) -> tuple:
+    """Return (sign, digits, exponent) with value == (-1)**sign * digits * 10**exponent.
+
+    Raises ValueError for infinities and NaNs; zero gives (sign, 0, 0).
+    """
+    sign, exp, mant = fmt.fields(bits)
+    if exp == fmt.exp_max:
+        raise ValueError("infinity and NaN have no decimal digits")
+    if exp == 0:
+        if mant == 0:
+            return sign, 0, 0
+        m2, e2 = mant, fmt.emin - fmt.mbits - 2
+    else:
+        m2, e2 = mant | fmt.hidden_bit, exp - fmt.bias - fmt.mbits - 2
+    accept_bounds = m2 & 1 == 0                           # ties round to even, so even values own their bounds
+    mv = 4 * m2
+    mp = mv + 2
+    mm = mv - 1 - (mant != 0 or exp <= 1)                 # lower gap is halved at a binade boundary
+
+    # Scale by 10**-e10 with e10 <= log10(2**e2): the interval stays at least one unit wide.
+    e10 = ((e2 * 78913) >> 18) - 1
+    num_scale = (1 << e2 if e2 > 0 else 1) * (_pow10(-e10) if e10 < 0 else 1)
+    den = (1 << -e2 if e2 < 0 else 1) * (_pow10(e10) if e10 > 0 else 1)
+    vr, rem = divmod(mv * num_scale, den)
+    last_digit, rest = divmod(10 * rem, den)
+    vr_trailing_zeros = rest == 0
+    vp, rem_p = divmod(mp * num_scale, den)
+    if rem_p == 0 and not accept_bounds:
+        vp -= 1
+    vm, rem_m = divmod(mm * num_scale, den)
+    vm_trailing_zeros = rem_m == 0
+
+    removed = 0
+    if vm_trailing_zeros or vr_trailing_zeros:
+        while vp // 10 > vm // 10:
+            vm_trailing_zeros &= vm % 10 == 0
+            vr_trailing_zeros &= last_digit == 0
+            vr, last_digit = divmod(vr, 10)
+            vp //= 10
+            vm //= 10
+            removed += 1
+        if vm_trailing_zeros and accept_bounds:
+            while vm % 10 == 0:
+                vr_trailing_zeros &= last_digit == 0
+                vr, last_digit = divmod(vr, 10)
+                vp //= 10
+                vm //= 10
+                removed += 1
+        if vr_trailing_zeros and last_digit == 5 and vr % 2 == 0:
+            last_digit = 4                                # exact tie: round half to even
+        round_up = (vr == vm and not (accept_bounds and vm_trailing_zeros)) or last_digit >= 5
+    else:
+        while vp // 10 > vm // 10:
+            vr, last_digit = divmod(vr, 10)
+            vp //= 10
+            vm //= 10
+            removed += 1
+        round_up = vr == vm or last_digit >= 5
+    return sign, vr + round_up, e10 + removed
+
+def _render(sign: int, digits: int, exponent: int) -> str:
+    """Lay out digits * 10**exponent the way repr() lays out a float."""
+    text = str(digits)
+    point = len(text) + exponent                          # position of the decimal point
+    prefix = "-" if sign else ""
+    if -4 < point <= 16:
+        if point <= 0:
+            return f"{prefix}0.{'0' * -point}{text}"
+        if point >= len(text):
+            return f"{prefix}{text}{'0' * (point - len(text))}.0"
+        return f"{prefix}{text[:point]}.{text[point:]}"
+    mantissa = text[0] + ("." + text[1:] if len(text) > 1 else "")
+    return f"{prefix}{mantissa}e{point - 1:+03d}"
+
+def shortest_repr(bits: int, fmt: FloatFormat = BINARY32) -> str:
+    """Shortest decimal string that reads back to the same `fmt` pattern."""
+    sign, exp, mant = fmt.fields(bits)
+    if exp == fmt.exp_max:
+        return "nan" if mant else ("-inf" if sign else "inf")
+    sign, digits, exponent = shortest_digits(bits, fmt)
+    if digits == 0:
+        return "-0.0" if sign else "0.0"
+    return _render(sign, digits, exponent)
+
+def shortest_repr_batch(patterns, fmt: FloatFormat = BINARY32) -> list:
+    return [shortest_repr(bits, fmt) for bits in patterns]
@@ -0,0 +1,87 @@
+"""
+Module: fileview.py
+
+Lazy, memory-mapped inspection of raw float32/float64 files of any size.
+"""
+
+import mmap
+import os
+
+from convert import buffer_to_bits, check_byteorder, split_ieee754
+
+# Records decoded per view; bounds memory and lets close() run while iterators are alive.
+CHUNK_RECORDS = 1 << 16
+
+class FloatFile:
+    """Random access to the records of a packed float file without loading it.
+
+    Records are read straight out of the mapping, so looking up record N is O(1)
+    and memory use does not grow with the file size.
+    """
+
+    def __init__(self, path, width: int = 32, byteorder: str = 'big'):
+        if width not in (32, 64):
+            raise ValueError(f"unsupported width {width}; expected 32 or 64")
+        check_byteorder(byteorder)
+        self.path = path
+        self.width = width
+        self.byteorder = byteorder
+        self.record_size = width // 8
+        size = os.path.getsize(path)
+        if size % self.record_size:
+            raise ValueError(f"{path}: size {size} is not a multiple of {self.record_size} bytes")
+        self._count = size // self.record_size
+        self._file = open(path, 'rb')
+        try:
+            # mmap cannot map an empty file; an empty bytes object stands in for it
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        except BaseException:
+            self._file.close()
+            raise
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def _range(self, start, stop):
+        start, stop, _ = slice(start, stop).indices(self._count)
+        return start, max(start, stop)
+
+    def iter_bits(self, start: int = 0, stop: int = None):
+        start, stop = self._range(start, stop)
+        size = self.record_size
+        for lo in range(start, stop, CHUNK_RECORDS):
+            hi = min(lo + CHUNK_RECORDS, stop)
+            with memoryview(self._map)[lo * size:hi * size] as view:
+                chunk = list(buffer_to_bits(view, self.width, self.byteorder))
+            yield from chunk
+
+    def bits(self, index: int) -> int:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"record {index} out of range for {self._count} records")
+        return next(self.iter_bits(index, index + 1))
+
+    def bit_string(self, index: int) -> str:
+        return f"{self.bits(index):0{self.width}b}"
+
+    def breakdown(self, index: int) -> tuple:
+        return split_ieee754(self.bit_string(index))
+
+    def iter_bit_strings(self, start: int = 0, stop: int = None):
+        fmt = f"0{self.width}b"
+        return (format(bits, fmt) for bits in self.iter_bits(start, stop))
+
+    def iter_breakdowns(self, start: int = 0, stop: int = None):
+        return map(split_ieee754, self.iter_bit_strings(start, stop))
@@ -0,0 +1,463 @@
+"""
+Module: formats.py
+
+Parametric IEEE-754 style binary formats described by (exponent bits, mantissa bits).
+Per-format constants are computed once and the instances are cached, so any width
+costs the same at runtime as the built-in 32/64-bit ones.
+"""
+
+import math
+import re
+import struct
+from collections import OrderedDict
+from decimal import Decimal
+from fractions import Fraction
+
+class LRUCache:
+    """Least-recently-used cache with hit/miss/eviction counters; subclasses supply the keys."""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def lookup(self, key, compute, arg):
+        """Cached value for `key`, computing it as compute(arg) on a miss."""
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = compute(arg)
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return value
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        while len(self._entries) > maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._entries), "maxsize": self.maxsize}
+
+def _power(key: tuple) -> int:
+    base, exponent = key
+    return base ** exponent
+
+class PowerCache(LRUCache):
+    """LRU cache of big-int powers keyed by (base, exponent).
+
+    Columns of similar-magnitude values keep asking for the same few exponents,
+    so a modest cache avoids recomputing thousand-digit powers of 5 and 10.
+    """
+
+    def power(self, base: int, exponent: int) -> int:
+        key = (base, exponent)
+        return self.lookup(key, _power, key)
+
+POWER_CACHE = PowerCache()
+
+def pow5(k: int) -> int:
+    return POWER_CACHE.power(5, k)
+
+def pow10(k: int) -> int:
+    return POWER_CACHE.power(10, k)
+
+def _round_rational(num: int, den: int, ebits: int, mbits: int) -> int:
+    """Round the positive rational num/den to the nearest (ties-to-even) magnitude pattern."""
+    bias = (1 << (ebits - 1)) - 1
+    exp = num.bit_length() - den.bit_length()
+    if (num << -exp if exp < 0 else num) < (den << exp if exp > 0 else den):
+        exp -= 1                                          # now 2**exp <= num/den < 2**(exp + 1)
+    exp = max(exp, 1 - bias)                              # subnormals share the minimum exponent
+    shift = mbits - exp
+    if shift >= 0:
+        sig, rem = divmod(num << shift, den)
+    else:
+        sig, rem = divmod(num, den << -shift)
+        den <<= -shift
+    if 2 * rem > den or (2 * rem == den and sig & 1):
+        sig += 1
+    if sig >> (mbits + 1):
+        sig >>= 1
+        exp += 1
+    if exp > bias:
+        return ((1 << ebits) - 1) << mbits                # overflow to infinity
+    if not sig >> mbits:
+        return sig                                        # subnormal (or zero)
+    return (exp + bias) << mbits | (sig & ((1 << mbits) - 1))
+
+LOG10_2 = math.log10(2)
+
+def _as_rational(value, fmt: "FloatFormat" = None) -> tuple:
+    """Return (sign, num, den) for a finite value, or (sign, None, kind) for inf/NaN.
+
+    With `fmt`, decimals far outside its range come back as inf or zero without
+    building the (possibly enormous) power of ten.
+    """
+    if isinstance(value, str):
+        value = Decimal(value)
+    if isinstance(value, float):
+        if value != value:
+            return 0, None, 'nan'
+        sign = 1 if math.copysign(1.0, value) < 0 else 0
+        if math.isinf(value):
+            return sign, None, 'inf'
+        num, den = abs(value).as_integer_ratio()
+        return sign, num, den
+    if isinstance(value, Decimal):
+        sign, digits, exponent = value.as_tuple()
+        if value.is_nan():
+            return sign, None, 'nan'
+        if value.is_infinite():
+            return sign, None, 'inf'
+        coeff = int(Decimal((0, digits, 0)))
+        if not coeff:
+            return sign, 0, 1
+        if fmt is not None:
+            adjusted = exponent + len(digits) - 1           # 10**adjusted <= |value| < 10**(adjusted + 1)
+            if adjusted > (fmt.emax + 1) * LOG10_2 + 1:
+                return sign, None, 'inf'
+            if adjusted + 1 < (fmt.emin - fmt.mbits - 1) * LOG10_2 - 1:
+                return sign, 0, 1
+        if exponent >= 0:
+            return sign, coeff * pow10(exponent), 1
+        return sign, coeff, pow10(-exponent)
+    value = Fraction(value)
+    return (1 if value < 0 else 0), abs(value.numerator), value.denominator
+
+def _exact_decimal(sign: int, coeff: int, exponent: int) -> Decimal:
+    # Decimal(int) converts without the str() digit limit and without context rounding
+    return Decimal((sign, Decimal(coeff).as_tuple().digits, exponent))
+
+_HEX_FLOAT = re.compile(r"\s*([+-]?)0[xX]([0-9a-fA-F]*)(?:\.([0-9a-fA-F]*))?(?:[pP]([+-]?[0-9]+))?\s*")
+_HEX_SPECIAL = {"inf": "inf", "infinity": "inf", "nan": "nan"}
+
+_INSTANCES = {}
+
+# rounding-direction attributes (IEEE 754-2019 section 4.3)
+ROUND_NEAREST_EVEN = "nearest_even"
+ROUND_NEAREST_AWAY = "nearest_away"
+ROUND_TOWARD_ZERO = "toward_zero"
+ROUND_UPWARD = "upward"
+ROUND_DOWNWARD = "downward"
+ROUNDING_MODES = (ROUND_NEAREST_EVEN, ROUND_NEAREST_AWAY, ROUND_TOWARD_ZERO, ROUND_UPWARD, ROUND_DOWNWARD)
+
+def check_rounding(rounding: str):
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"unknown rounding mode {rounding!r}; expected one of {ROUNDING_MODES}")
+
+def round_up(rounding: str, sign: int, kept: int, rem: int, half: int) -> bool:
+    """Whether to add one ulp to `kept` given the discarded remainder `rem` (half = the halfway value)."""
+    if rounding == ROUND_NEAREST_EVEN:
+        return rem > half or (rem == half and kept & 1 == 1)
+    if rounding == ROUND_NEAREST_AWAY:
+        return rem >= half
+    if rounding == ROUND_TOWARD_ZERO or not rem:
+        return False
+    return (rounding == ROUND_UPWARD) != bool(sign)
+
+def overflow_bits(fmt: "FloatFormat", sign: int, rounding: str) -> int:
+    """Result of an overflow: infinity, or the largest finite value when rounding toward zero from it."""
+    if rounding == ROUND_TOWARD_ZERO or (rounding == ROUND_UPWARD and sign) \
+            or (rounding == ROUND_DOWNWARD and not sign):
+        return sign << fmt.sign_shift | fmt.max_normal_bits
+    return sign << fmt.sign_shift | fmt.inf_bits
+
+# value classes, as reported by Fields.kind and the batch classifiers
+ZERO, SUBNORMAL, NORMAL, INFINITY, QUIET_NAN, SIGNALING_NAN = range(6)
+CLASS_NAMES = ("zero", "subnormal", "normal", "infinity", "quiet_nan", "signaling_nan")
+
+class Fields:
+    """Integer decomposition of one pattern: sign, biased/unbiased exponent, mantissa and class."""
+
+    __slots__ = ("sign", "exponent", "unbiased", "mantissa", "kind")
+
+    def __init__(self, sign: int, exponent: int, unbiased: int, mantissa: int, kind: int):
+        self.sign = sign
+        self.exponent = exponent
+        self.unbiased = unbiased
+        self.mantissa = mantissa
+        self.kind = kind
+
+    @property
+    def kind_name(self) -> str:
+        return CLASS_NAMES[self.kind]
+
+    def __iter__(self):
+        return iter((self.sign, self.exponent, self.unbiased, self.mantissa, self.kind))
+
+    def __eq__(self, other):
+        return isinstance(other, Fields) and tuple(self) == tuple(other)
+
+    def __repr__(self) -> str:
+        return (f"Fields(sign={self.sign}, exponent={self.exponent}, unbiased={self.unbiased}, "
+                f"mantissa={self.mantissa:#x}, kind={self.kind_name!r})")
+
+# (ebits, mbits) -> (float struct code, pattern struct code) for formats the host packs natively
+_NATIVE = {(5, 10): ('!e', '!H'), (8, 23): ('!f', '!I'), (11, 52): ('!d', '!Q')}
+
+class FloatFormat:
+    """A binary interchange format with `ebits` exponent and `mbits` trailing significand bits."""
+
+    def __init__(self, ebits: int, mbits: int, name: str = None):
+        if ebits < 2 or mbits < 1:
+            raise ValueError(f"need at least 2 exponent bits and 1 mantissa bit, got ({ebits}, {mbits})")
+        self.ebits = ebits
+        self.mbits = mbits
+        self.width = 1 + ebits + mbits
+        self.name = name or f"binary{self.width}(e{ebits}m{mbits})"
+        self.bias = (1 << (ebits - 1)) - 1
+        self.emin = 1 - self.bias
+        self.emax = self.bias
+        self.sign_shift = self.width - 1
+        self.sign_mask = 1 << self.sign_shift
+        self.exp_max = (1 << ebits) - 1
+        self.exp_mask = self.exp_max << mbits
+        self.mant_mask = (1 << mbits) - 1
+        self.hidden_bit = 1 << mbits
+        self.abs_mask = self.sign_mask - 1
+        self.inf_bits = self.exp_mask
+        self.qnan_bits = self.exp_mask | (1 << (mbits - 1))
+        self.max_normal_bits = self.inf_bits - 1
+        self.min_normal_bits = self.hidden_bit
+        # exact magnitudes of the range boundaries
+        self.max_normal = Fraction((2 * self.hidden_bit - 1) << self.emax, self.hidden_bit)
+        self.min_normal = Fraction(1, 1 << -self.emin) if self.emin < 0 else Fraction(1 << self.emin)
+        self.min_subnormal = self.min_normal / self.hidden_bit
+        self.hex_pad = -mbits % 4                         # mantissa shifted left to whole hex digits
+        self.hex_digits = (mbits + self.hex_pad) // 4
+        native = _NATIVE.get((ebits, mbits))
+        self._native = (struct.Struct(native[0]), struct.Struct(native[1])) if native else None
+        _INSTANCES.setdefault((ebits, mbits), self)
+
+    @classmethod
+    def get(cls, ebits: int, mbits: int) -> "FloatFormat":
+        """Shared, cached instance for (ebits, mbits)."""
+        fmt = _INSTANCES.get((ebits, mbits))
+        if fmt is None:
+            fmt = cls(ebits, mbits)
+        return fmt
+
+    def __repr__(self) -> str:
+        return f"FloatFormat({self.ebits}, {self.mbits})"
+
+    # -- fields --
+    def fields(self, bits: int) -> tuple:
+        """(sign, biased exponent, mantissa) of a pattern."""
+        return bits >> self.sign_shift, (bits >> self.mbits) & self.exp_max, bits & self.mant_mask
+
+    def compose(self, sign: int, exponent: int, mantissa: int) -> int:
+        return sign << self.sign_shift | exponent << self.mbits | mantissa
+
+    def split(self, binary: str) -> tuple:
+        """(sign, exponent, mantissa) substrings of a `width`-character pattern."""
+        if len(binary) != self.width:
+            raise ValueError(f"expected a {self.width} bit pattern, got {len(binary)} bits")
+        return binary[0], binary[1:1 + self.ebits], binary[1 + self.ebits:]
+
+    def to_string(self, bits: int) -> str:
+        return format(bits, f"0{self.width}b")
+
+    def breakdown(self, bits: int) -> tuple:
+        return self.split(self.to_string(bits))
+
+    def decompose(self, bits: int) -> Fields:
+        exp = (bits >> self.mbits) & self.exp_max
+        mant = bits & self.mant_mask
+        if exp == self.exp_max:
+            if not mant:
+                kind = INFINITY
+            else:
+                kind = QUIET_NAN if mant >> (self.mbits - 1) else SIGNALING_NAN
+        elif exp:
+            kind = NORMAL
+        else:
+            kind = SUBNORMAL if mant else ZERO
+        unbiased = exp - self.bias if exp else self.emin
+        return Fields(bits >> self.sign_shift, exp, unbiased, mant, kind)
+
+    # -- encode / decode --
+    def encode(self, value) -> int:
+        """Correctly rounded pattern of an int, float, Fraction, Decimal or decimal string."""
+        if self._native is not None and isinstance(value, float):
+            try:
+                return self._native[1].unpack(self._native[0].pack(value))[0]
+            except OverflowError:
+                return (self.sign_mask if value < 0 else 0) | self.inf_bits
+        sign, num, den = _as_rational(value, self)
+        if num is None:
+            return sign << self.sign_shift | (self.qnan_bits if den == 'nan' else self.inf_bits)
+        return sign << self.sign_shift | (_round_rational(num, den, self.ebits, self.mbits) if num else 0)
+
+    def _significand(self, bits: int) -> tuple:
+        sign, exp, mant = self.fields(bits)
+        if exp == self.exp_max:
+            raise ValueError("infinity and NaN have no exact rational value")
+        if exp:
+            return sign, mant | self.hidden_bit, exp - self.bias - self.mbits
+        return sign, mant, self.emin - self.mbits
+
+    def decode_exact(self, bits: int) -> Fraction:
+        sign, sig, exp = self._significand(bits)
+        value = Fraction(sig << exp) if exp >= 0 else Fraction(sig, 1 << -exp)
+        return -value if sign else value
+
+    def decode_decimal(self, bits: int) -> Decimal:
+        """Exact decimal expansion of a pattern (inf/NaN map to Decimal specials)."""
+        if (bits >> self.mbits) & self.exp_max == self.exp_max:
+            sign = '-' if bits >> self.sign_shift else ''
+            return Decimal(sign + ('NaN' if bits & self.mant_mask else 'Infinity'))
+        sign, sig, exp = self._significand(bits)
+        if exp >= 0:
+            return _exact_decimal(sign, sig << exp, 0)
+        # sig / 2**k == sig * 5**k / 10**k, which is exact in decimal
+        return _exact_decimal(sign, sig * pow5(-exp), exp)
+
+    def to_decimal(self, bits: int, digits: int = None) -> Decimal:
+        """Value of a pattern as a Decimal: exact, or correctly rounded to `digits` significant digits."""
+        if digits is None or (bits >> self.mbits) & self.exp_max == self.exp_max:
+            return self.decode_decimal(bits)
+        if digits < 1:
+            raise ValueError(f"digits must be at least 1, got {digits}")
+        sign, sig, exp = self._significand(bits)
+        if sig == 0:
+            return Decimal((sign, (0,), 0))
+        # exponent of the last kept digit; the estimate of log10 may be one low
+        q = (((sig.bit_length() - 1 + exp) * 78913) >> 18) - digits + 1
+        num_scale = 1 << exp if exp > 0 else 1
+        den_scale = 1 << -exp if exp < 0 else 1
+        while True:
+            num = sig * num_scale * (pow10(-q) if q < 0 else 1)
+            den = den_scale * (pow10(q) if q > 0 else 1)
+            kept, rem = divmod(num, den)
+            if kept < pow10(digits):
+                break
+            q += 1
+        if 2 * rem > den or (2 * rem == den and kept & 1):
+            kept += 1
+            if kept == pow10(digits):                     # 99.9 -> 100: drop the extra zero
+                kept //= 10
+                q += 1
+        return _exact_decimal(sign, kept, q)
+
+    def decode(self, bits: int) -> float:
+        """Nearest Python float to the pattern's value."""
+        if self._native is not None:
+            return self._native[0].unpack(self._native[1].pack(bits))[0]
+        sign, exp, mant = self.fields(bits)
+        if exp == self.exp_max:
+            return math.nan if mant else (-math.inf if sign else math.inf)
+        try:
+            return float(self.decode_exact(bits))
+        except OverflowError:
+            return -math.inf if sign else math.inf
+
+    # -- C99 hexadecimal floats --
+    def to_hex(self, bits: int) -> str:
+        """printf("%a")-style hex float such as 0x1.8p+3; subnormals read 0x0.<digits>p<emin>."""
+        sign, exp, mant = self.fields(bits)
+        prefix = "-" if sign else ""
+        if exp == self.exp_max:
+            return "nan" if mant else prefix + "inf"
+        if exp == 0 and mant == 0:
+            return prefix + "0x0p+0"
+        lead, power = (1, exp - self.bias) if exp else (0, self.emin)
+        digits = format(mant << self.hex_pad, f"0{self.hex_digits}x").rstrip("0")
+        return f"{prefix}0x{lead}{'.' + digits if digits else ''}p{power:+d}"
+
+    def from_hex(self, text: str) -> int:
+        """Correctly rounded pattern of a hex float string (strtod syntax, 'p' exponent optional)."""
+        match = _HEX_FLOAT.fullmatch(text)
+        if match is None or not (match.group(2) or match.group(3)):
+            sign, word = (1, text.strip()[1:]) if text.strip()[:1] == "-" else (0, text.strip().lstrip("+"))
+            kind = _HEX_SPECIAL.get(word.lower())
+            if kind is None:
+                raise ValueError(f"invalid hexadecimal float: {text!r}")
+            return sign << self.sign_shift | (self.qnan_bits if kind == "nan" else self.inf_bits)
+        sign = 1 if match.group(1) == "-" else 0
+        whole, frac, power = match.group(2), match.group(3) or "", int(match.group(4) or 0)
+        num = int(whole + frac, 16)
+        power -= 4 * len(frac)
+        if not num:
+            return sign << self.sign_shift
+        # settle far out-of-range exponents before shifting by them
+        top = num.bit_length() + power                    # value < 2**top
+        if top > self.emax + 2:
+            return sign << self.sign_shift | self.inf_bits
+        if top < self.emin - self.mbits - 1:
+            return sign << self.sign_shift                # below half the smallest subnormal
+        den = 1
+        if power >= 0:
+            num <<= power
+        else:
+            den <<= -power
+        return sign << self.sign_shift | _round_rational(num, den, self.ebits, self.mbits)
+
+BINARY16 = FloatFormat(5, 10, "binary16")
+BFLOAT16 = FloatFormat(8, 7, "bfloat16")
+BINARY32 = FloatFormat(8, 23, "binary32")
+BINARY64 = FloatFormat(11, 52, "binary64")
+BINARY128 = FloatFormat(15, 112, "binary128")
+
+FORMATS = {fmt.name: fmt for fmt in (BINARY16, BFLOAT16, BINARY32, BINARY64, BINARY128)}
+_BY_WIDTH = {16: BINARY16, 32: BINARY32, 64: BINARY64, 128: BINARY128}
+
+def format_for_width(width: int) -> FloatFormat:
+    """The standard IEEE-754 interchange format of a given total width."""
+    try:
+        return _BY_WIDTH[width]
+    except KeyError:
+        raise ValueError(f"no standard format is {width} bits wide") from None
+
+def convert_format(bits: int, src: FloatFormat, dst: FloatFormat, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    """Convert a pattern between formats with integer shifts only.
+
+    Widening is exact. Narrowing rounds in the given mode; NaNs keep their sign and
+    as many leading payload bits as fit, and a signaling NaN stays signaling.
+    """
+    sign = bits >> src.sign_shift
+    exp = (bits >> src.mbits) & src.exp_max
+    mant = bits & src.mant_mask
+    out_sign = sign << dst.sign_shift
+    if exp == src.exp_max:
+        if not mant:
+            return out_sign | dst.inf_bits
+        shift = src.mbits - dst.mbits
+        payload = mant >> shift if shift >= 0 else mant << -shift
+        return out_sign | dst.exp_mask | (payload or 1)
+    if exp:
+        sig, lsb = mant | src.hidden_bit, exp - src.bias - src.mbits
+    elif mant:
+        sig, lsb = mant, src.emin - src.mbits
+    else:
+        return out_sign
+    # exponent of the destination's last significand bit
+    target = max(sig.bit_length() - 1 + lsb - dst.mbits, dst.emin - dst.mbits)
+    shift = target - lsb
+    if shift <= 0:
+        kept = sig << -shift
+    else:
+        kept = sig >> shift
+        if round_up(rounding, sign, kept, sig & ((1 << shift) - 1), 1 << (shift - 1)):
+            kept += 1
+            if kept >> (dst.mbits + 1):
+                kept >>= 1
+                target += 1
+    if not kept >> dst.mbits:
+        return out_sign | kept                            # subnormal or zero
+    biased = target + dst.mbits + dst.bias
+    if biased >= dst.exp_max:
+        return overflow_bits(dst, sign, rounding)
+    return out_sign | biased << dst.mbits | (kept & dst.mant_mask)
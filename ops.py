@@ -1,11 +1,25 @@
 """
 Module: ops.py
 
-Performs IEEE-754 style addition and multiplication on 32/64-bit floats.
+Performs IEEE-754 style arithmetic on 32/64-bit floats: addition, multiplication,
+division, square root and fused multiply-add.
+
+The *_bits functions are a soft-float engine: they work on integer bit patterns
+with integer arithmetic only, so any rounding mode can be modelled bit-exactly.
 """
 
-from convert import float_to_ieee754, ieee754_to_float, \
-                    float_to_ieee754_64, ieee754_to_float_64
+import array
+import math
+from itertools import repeat
+
+from convert import pattern_array, require_numpy
+from formats import BINARY32, BINARY64, ROUND_NEAREST_EVEN, ROUND_DOWNWARD, \
+                    check_rounding, round_up, overflow_bits
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed by the *_array functions
+    np = None
 
 def add_floats(a: float, b: float) -> float:
     return a + b
@@ -13,15 +27,11 @@ def add_floats(a: float, b: float) -> float:
 def multiply_floats(a: float, b: float) -> float:
     return a * b
 
-def add_ieee754(bin_a: str, bin_b: str) -> str:
-    a = ieee754_to_float(bin_a)
-    b = ieee754_to_float(bin_b)
-    return float_to_ieee754(a + b)
+def add_ieee754(bin_a: str, bin_b: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{add_bits32(int(bin_a, 2), int(bin_b, 2), rounding):032b}"
 
-def multiply_ieee754(bin_a: str, bin_b: str) -> str:
-    a = ieee754_to_float(bin_a)
-    b = ieee754_to_float(bin_b)
-    return float_to_ieee754(a * b)
+def multiply_ieee754(bin_a: str, bin_b: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{mul_bits32(int(bin_a, 2), int(bin_b, 2), rounding):032b}"
 
 # --- NEW 64-bit functions ---
 def add_floats_64(a: float, b: float) -> float:
@@ -30,12 +40,427 @@ def add_floats_64(a: float, b: float) -> float:
 def multiply_floats_64(a: float, b: float) -> float:
     return a * b
 
-def add_ieee754_64(bin_a: str, bin_b: str) -> str:
-    a = ieee754_to_float_64(bin_a)
-    b = ieee754_to_float_64(bin_b)
-    return float_to_ieee754_64(a + b)
+def add_ieee754_64(bin_a: str, bin_b: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{add_bits64(int(bin_a, 2), int(bin_b, 2), rounding):064b}"
+
+def multiply_ieee754_64(bin_a: str, bin_b: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{mul_bits64(int(bin_a, 2), int(bin_b, 2), rounding):064b}"
+
+# --- Soft-float engine on integer patterns ---
+def _pack(fmt, sign: int, sig: int, lsb: int, rounding: str) -> int:
+    """Round sig * 2**lsb (sig > 0) to a `fmt` pattern.
+
+    `sig` is either exact or carries a sticky 1 at least two bits below the final ulp.
+    """
+    if rounding != ROUND_NEAREST_EVEN:
+        check_rounding(rounding)
+    mbits = fmt.mbits
+    low = fmt.emin - mbits                                # exponent of a subnormal's last bit
+    shift = max(sig.bit_length() - mbits - 1, low - lsb)
+    if shift > 0:
+        kept = sig >> shift
+        rem = sig & ((1 << shift) - 1)
+        if rem and round_up(rounding, sign, kept, rem, 1 << (shift - 1)):
+            kept += 1
+    else:
+        kept = sig << -shift
+    # with the hidden bit left in, a rounding carry (or a subnormal reaching 1.0) bumps the exponent
+    mag = ((lsb + shift - low) << mbits) + kept
+    if mag >= fmt.inf_bits:
+        return overflow_bits(fmt, sign, rounding)
+    return sign << fmt.sign_shift | mag
+
+# NaN results follow x86 SSE/AVX: the first NaN operand (in argument order), quieted,
+# wins regardless of signaling vs quiet; invalid operations return the "real indefinite"
+# default NaN, which has the sign bit set. (ARM differs on both counts.)
+def _default_nan(fmt) -> int:
+    return fmt.sign_mask | fmt.qnan_bits
+
+def _propagate_nan(a: int, b: int, fmt) -> int:
+    """First NaN operand, quieted, as x86 SSE returns it; None if neither is a NaN."""
+    quiet = 1 << (fmt.mbits - 1)
+    if a & fmt.abs_mask > fmt.inf_bits:
+        return a | quiet
+    if b & fmt.abs_mask > fmt.inf_bits:
+        return b | quiet
+    return None
+
+def _add_special(a: int, b: int, fmt) -> int:
+    nan = _propagate_nan(a, b, fmt)
+    if nan is not None:
+        return nan
+    if a & fmt.abs_mask == b & fmt.abs_mask and a != b:
+        return _default_nan(fmt)                          # inf - inf
+    return a if a & fmt.abs_mask == fmt.inf_bits else b
+
+def _make_adder(fmt):
+    """Build a pattern adder for `fmt` with its constants bound as locals."""
+    mbits = fmt.mbits
+    exp_max = fmt.exp_max
+    mant_mask = fmt.mant_mask
+    hidden = fmt.hidden_bit
+    sign_shift = fmt.sign_shift
+    inf_bits = fmt.inf_bits
+    precision = mbits + 1
+    far = mbits + 3
+    lsb_offset = fmt.emin - mbits - 1                     # biased exponent -> exponent of its last bit
+
+    def add(a: int, b: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+        ea = (a >> mbits) & exp_max
+        eb = (b >> mbits) & exp_max
+        if ea == exp_max or eb == exp_max:
+            return _add_special(a, b, fmt)
+        sa = a >> sign_shift
+        sb = b >> sign_shift
+        if ea:
+            ma = (a & mant_mask) | hidden
+        else:
+            ma, ea = a & mant_mask, 1
+        if eb:
+            mb = (b & mant_mask) | hidden
+        else:
+            mb, eb = b & mant_mask, 1
+        if ea < eb:
+            ea, eb, ma, mb, sa, sb = eb, ea, mb, ma, sb, sa
+        diff = ea - eb
+        if diff > far:
+            # b is below a quarter ulp of the result: keep guard/round bits and fold b into sticky
+            ma <<= 3
+            mb = 1 if mb else 0
+            eb = ea - 3
+        else:
+            ma <<= diff
+        if sa == sb:
+            sig = ma + mb
+            if not sig:
+                return sa << sign_shift
+        else:
+            sig = ma - mb
+            if sig < 0:
+                sig, sa = -sig, sb
+            elif not sig:
+                return (rounding == ROUND_DOWNWARD) << sign_shift
+        if rounding != ROUND_NEAREST_EVEN:
+            return _pack(fmt, sa, sig, eb + lsb_offset, rounding)
+        # round to nearest even, inlined
+        shift = sig.bit_length() - precision
+        if eb + shift < 1:
+            shift = 1 - eb
+        if shift > 0:
+            half = 1 << (shift - 1)
+            rem = sig & ((half << 1) - 1)
+            sig >>= shift
+            if rem > half or (rem == half and sig & 1):
+                sig += 1
+        else:
+            sig <<= -shift
+        mag = ((eb + shift - 1) << mbits) + sig
+        if mag >= inf_bits:
+            return sa << sign_shift | inf_bits
+        return sa << sign_shift | mag
+
+    return add
+
+add_bits32 = _make_adder(BINARY32)
+add_bits64 = _make_adder(BINARY64)
+
+def add_bits32_batch(a, b, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('I', map(add_bits32, a, b, repeat(rounding)))
+
+def add_bits64_batch(a, b, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('Q', map(add_bits64, a, b, repeat(rounding)))
+
+def _mul_special(a: int, b: int, fmt) -> int:
+    nan = _propagate_nan(a, b, fmt)
+    if nan is not None:
+        return nan
+    if not a & fmt.abs_mask or not b & fmt.abs_mask:
+        return _default_nan(fmt)                          # inf * 0
+    return ((a ^ b) & fmt.sign_mask) | fmt.inf_bits
+
+def _make_multiplier(fmt):
+    """Build a pattern multiplier for `fmt` with its constants bound as locals."""
+    mbits = fmt.mbits
+    exp_max = fmt.exp_max
+    mant_mask = fmt.mant_mask
+    hidden = fmt.hidden_bit
+    sign_shift = fmt.sign_shift
+    inf_bits = fmt.inf_bits
+    precision = mbits + 1
+    lsb_offset = fmt.emin - mbits - 1
+    low = fmt.emin - mbits
+
+    def mul(a: int, b: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+        ea = (a >> mbits) & exp_max
+        eb = (b >> mbits) & exp_max
+        if ea == exp_max or eb == exp_max:
+            return _mul_special(a, b, fmt)
+        sign = (a ^ b) >> sign_shift
+        if ea:
+            ma = (a & mant_mask) | hidden
+        else:
+            ma, ea = a & mant_mask, 1
+        if eb:
+            mb = (b & mant_mask) | hidden
+        else:
+            mb, eb = b & mant_mask, 1
+        sig = ma * mb                                     # exact 2p-bit product
+        if not sig:
+            return sign << sign_shift
+        lsb = ea + eb + 2 * lsb_offset
+        if rounding != ROUND_NEAREST_EVEN:
+            return _pack(fmt, sign, sig, lsb, rounding)
+        shift = sig.bit_length() - precision
+        if lsb + shift < low:
+            shift = low - lsb
+        if shift > 0:
+            half = 1 << (shift - 1)
+            rem = sig & ((half << 1) - 1)
+            sig >>= shift
+            if rem > half or (rem == half and sig & 1):
+                sig += 1
+        else:
+            sig <<= -shift
+        mag = ((lsb + shift - low) << mbits) + sig
+        if mag >= inf_bits:
+            return sign << sign_shift | inf_bits
+        return sign << sign_shift | mag
+
+    return mul
+
+mul_bits32 = _make_multiplier(BINARY32)
+mul_bits64 = _make_multiplier(BINARY64)
+
+def mul_bits32_batch(a, b, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('I', map(mul_bits32, a, b, repeat(rounding)))
+
+def mul_bits64_batch(a, b, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('Q', map(mul_bits64, a, b, repeat(rounding)))
+
+def _unpack(bits: int, fmt):
+    """(sign, significand, exponent of its last bit) of a finite pattern."""
+    exp = (bits >> fmt.mbits) & fmt.exp_max
+    sig = bits & fmt.mant_mask
+    if exp:
+        sig |= fmt.hidden_bit
+    else:
+        exp = 1
+    return bits >> fmt.sign_shift, sig, exp + fmt.emin - fmt.mbits - 1
+
+def _div(a: int, b: int, fmt, rounding: str) -> int:
+    sign = (a ^ b) >> fmt.sign_shift
+    abs_a = a & fmt.abs_mask
+    abs_b = b & fmt.abs_mask
+    if abs_a >= fmt.inf_bits or abs_b >= fmt.inf_bits:
+        nan = _propagate_nan(a, b, fmt)
+        if nan is not None:
+            return nan
+        if abs_a == abs_b:
+            return _default_nan(fmt)                      # inf / inf
+        return sign << fmt.sign_shift | (fmt.inf_bits if abs_a == fmt.inf_bits else 0)
+    if not abs_b:
+        return _default_nan(fmt) if not abs_a else sign << fmt.sign_shift | fmt.inf_bits
+    if not abs_a:
+        return sign << fmt.sign_shift
+    _, ma, la = _unpack(a, fmt)
+    _, mb, lb = _unpack(b, fmt)
+    # long division to p + 2 quotient bits; the exact remainder becomes the sticky bit
+    k = fmt.mbits + 3 + mb.bit_length() - ma.bit_length()
+    quo, rem = divmod(ma << k, mb)
+    return _pack(fmt, sign, quo << 1 | (rem != 0), la - lb - k - 1, rounding)
+
+def _sqrt(a: int, fmt, rounding: str) -> int:
+    if a & fmt.abs_mask > fmt.inf_bits:
+        return a | 1 << (fmt.mbits - 1)
+    if not a & fmt.abs_mask:
+        return a                                          # sqrt(-0) is -0
+    if a >> fmt.sign_shift:
+        return _default_nan(fmt)
+    if a == fmt.inf_bits:
+        return a
+    _, sig, lsb = _unpack(a, fmt)
+    # scale to at least 2(p + 2) bits with an even exponent, then take the integer root
+    k = max(2 * fmt.mbits + 6 - sig.bit_length(), 0)
+    k += (lsb - k) & 1
+    radicand = sig << k
+    root = math.isqrt(radicand)
+    return _pack(fmt, 0, root << 1 | (root * root != radicand), (lsb - k) // 2 - 1, rounding)
+
+def div_bits32(a: int, b: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    return _div(a, b, BINARY32, rounding)
+
+def div_bits64(a: int, b: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    return _div(a, b, BINARY64, rounding)
+
+def sqrt_bits32(a: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    return _sqrt(a, BINARY32, rounding)
+
+def sqrt_bits64(a: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    return _sqrt(a, BINARY64, rounding)
+
+def div_bits32_batch(a, b, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('I', map(div_bits32, a, b, repeat(rounding)))
+
+def div_bits64_batch(a, b, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('Q', map(div_bits64, a, b, repeat(rounding)))
+
+def sqrt_bits32_batch(a, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('I', map(sqrt_bits32, a, repeat(rounding)))
+
+def sqrt_bits64_batch(a, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('Q', map(sqrt_bits64, a, repeat(rounding)))
+
+def divide_ieee754(bin_a: str, bin_b: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{div_bits32(int(bin_a, 2), int(bin_b, 2), rounding):032b}"
+
+def divide_ieee754_64(bin_a: str, bin_b: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{div_bits64(int(bin_a, 2), int(bin_b, 2), rounding):064b}"
+
+def sqrt_ieee754(binary: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{sqrt_bits32(int(binary, 2), rounding):032b}"
+
+def sqrt_ieee754_64(binary: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{sqrt_bits64(int(binary, 2), rounding):064b}"
+
+# --- Fused multiply-add: a * b + c with a single rounding ---
+def _fma(a: int, b: int, c: int, fmt, rounding: str) -> int:
+    abs_a = a & fmt.abs_mask
+    abs_b = b & fmt.abs_mask
+    abs_c = c & fmt.abs_mask
+    psign = (a ^ b) >> fmt.sign_shift
+    if abs_a >= fmt.inf_bits or abs_b >= fmt.inf_bits or abs_c >= fmt.inf_bits:
+        nan = _propagate_nan(a, b, fmt)
+        if nan is None:
+            nan = _propagate_nan(c, 0, fmt)
+        if nan is not None:
+            return nan
+        if abs_a == fmt.inf_bits or abs_b == fmt.inf_bits:
+            if not abs_a or not abs_b:
+                return _default_nan(fmt)                  # inf * 0
+            product = psign << fmt.sign_shift | fmt.inf_bits
+            return _add_special(product, c, fmt)
+        return c
+    if not abs_a or not abs_b:
+        if abs_c:
+            return c
+        if psign == c >> fmt.sign_shift:
+            return c
+        return (rounding == ROUND_DOWNWARD) << fmt.sign_shift
+    _, ma, la = _unpack(a, fmt)
+    _, mb, lb = _unpack(b, fmt)
+    prod, lp = ma * mb, la + lb                           # exact, up to 2p bits
+    if not abs_c:
+        return _pack(fmt, psign, prod, lp, rounding)
+    csign, mc, lc = _unpack(c, fmt)
+    # X is the term with the higher leading bit; Y the other one
+    if lp + prod.bit_length() >= lc + mc.bit_length():
+        xs, xm, xl, ys, ym, yl = psign, prod, lp, csign, mc, lc
+    else:
+        xs, xm, xl, ys, ym, yl = csign, mc, lc, psign, prod, lp
+    floor = min(xl, xl + xm.bit_length() - fmt.mbits - 5)
+    if yl + ym.bit_length() < floor:
+        # Y is below a quarter ulp of any possible result: keep it only as a sticky bit
+        sig = (xm << (xl - floor + 1)) + (1 if xs == ys else -1)
+        return _pack(fmt, xs, sig, floor - 1, rounding)
+    lsb = min(xl, yl)
+    sig = (xm << (xl - lsb)) + ((ym << (yl - lsb)) if xs == ys else -(ym << (yl - lsb)))
+    if not sig:
+        return (rounding == ROUND_DOWNWARD) << fmt.sign_shift
+    if sig < 0:
+        return _pack(fmt, ys, -sig, lsb, rounding)
+    return _pack(fmt, xs, sig, lsb, rounding)
+
+def fma_bits32(a: int, b: int, c: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    return _fma(a, b, c, BINARY32, rounding)
+
+def fma_bits64(a: int, b: int, c: int, rounding: str = ROUND_NEAREST_EVEN) -> int:
+    return _fma(a, b, c, BINARY64, rounding)
+
+def fma_bits32_batch(a, b, c, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('I', map(fma_bits32, a, b, c, repeat(rounding)))
+
+def fma_bits64_batch(a, b, c, rounding: str = ROUND_NEAREST_EVEN) -> array.array:
+    return array.array('Q', map(fma_bits64, a, b, c, repeat(rounding)))
+
+def fma_ieee754(bin_a: str, bin_b: str, bin_c: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{fma_bits32(int(bin_a, 2), int(bin_b, 2), int(bin_c, 2), rounding):032b}"
+
+def fma_ieee754_64(bin_a: str, bin_b: str, bin_c: str, rounding: str = ROUND_NEAREST_EVEN) -> str:
+    return f"{fma_bits64(int(bin_a, 2), int(bin_b, 2), int(bin_c, 2), rounding):064b}"
+
+# Vectorized FMA: error-free transformations in float64 with a round-to-odd step,
+# which makes the final round-to-nearest correct (Boldo & Melquiond).
+def _two_sum(x, y):
+    s = x + y
+    bp = s - x
+    ap = s - bp
+    return s, (x - ap) + (y - bp)
+
+def _two_product(x, y):
+    p = x * y
+    xh, xl = _split(x)
+    yh, yl = _split(y)
+    return p, ((xh * yh - p) + xh * yl + xl * yh) + xl * yl
+
+def _split(x):
+    g = x * 134217729.0                                   # 2**27 + 1
+    hi = g - (g - x)
+    return hi, x - hi
+
+def _round_to_odd(s, err):
+    """Turn s = RN(x + y) into the round-to-odd sum, given the exact error err."""
+    bits = s.view(np.uint64)
+    step = np.where(np.signbit(err) == np.signbit(s), np.uint64(1), np.uint64(0xFFFFFFFFFFFFFFFF))
+    return np.where((err != 0) & (bits & np.uint64(1) == 0), bits + step, bits).view(np.float64)
+
+def _fma_operands(a, b, c, width: int):
+    """Broadcast the three pattern arrays and flatten them; also returns the result shape."""
+    a, b, c = np.broadcast_arrays(*(pattern_array(x, width) for x in (a, b, c)))
+    return a.ravel(), b.ravel(), c.ravel(), a.shape
+
+def _fma_redo(out, a, b, c, redo, scalar, rounding: str):
+    """Recompute the lanes selected by `redo` with the scalar engine."""
+    idx = np.flatnonzero(redo)
+    if idx.size:
+        out[idx] = list(map(scalar, a[idx].tolist(), b[idx].tolist(), c[idx].tolist(), repeat(rounding)))
+    return out
+
+def fma_bits32_array(a, b, c, rounding: str = ROUND_NEAREST_EVEN):
+    """a * b + c on float32 pattern arrays, rounded once."""
+    require_numpy()
+    a, b, c, shape = _fma_operands(a, b, c, 32)
+    if rounding != ROUND_NEAREST_EVEN:
+        out = _fma_redo(np.empty_like(a), a, b, c, np.ones(a.shape, dtype=bool), fma_bits32, rounding)
+        return out.reshape(shape)
+    with np.errstate(all='ignore'):
+        # float32 products are exact in float64, and a round-to-odd float64 sum
+        # has enough extra bits to round correctly to float32
+        p = a.view(np.float32).astype(np.float64) * b.view(np.float32).astype(np.float64)
+        s, err = _two_sum(p, c.view(np.float32).astype(np.float64))
+        out = _round_to_odd(s, err).astype(np.float32).view(np.uint32)
+    special = np.uint32(BINARY32.exp_mask)
+    redo = ((a & special) == special) | ((b & special) == special) | ((c & special) == special)
+    return _fma_redo(out, a, b, c, redo, fma_bits32, rounding).reshape(shape)
+
+def fma_bits64_array(a, b, c, rounding: str = ROUND_NEAREST_EVEN):
+    """a * b + c on float64 pattern arrays, rounded once.
 
-def multiply_ieee754_64(bin_a: str, bin_b: str) -> str:
-    a = ieee754_to_float_64(bin_a)
-    b = ieee754_to_float_64(bin_b)
-    return float_to_ieee754_64(a * b)
+    Lanes whose operands or result get near overflow or the subnormal range, where
+    the error-free transformations stop being exact, fall back to the scalar engine.
+    """
+    require_numpy()
+    a, b, c, shape = _fma_operands(a, b, c, 64)
+    if rounding != ROUND_NEAREST_EVEN:
+        out = _fma_redo(np.empty_like(a), a, b, c, np.ones(a.shape, dtype=bool), fma_bits64, rounding)
+        return out.reshape(shape)
+    fa, fb, fc = a.view(np.float64), b.view(np.float64), c.view(np.float64)
+    with np.errstate(all='ignore'):
+        uh, ul = _two_product(fa, fb)
+        th, tl = _two_sum(fc, uh)
+        v = _round_to_odd(*_two_sum(tl, ul))
+        z = th + v
+        # NaN compares false, so non-finite lanes land in `redo` as well
+        safe = (np.abs(fa) < 2.0 ** 995) & (np.abs(fb) < 2.0 ** 995) & (np.abs(fc) < 2.0 ** 1000) \
+            & (np.abs(uh) < 2.0 ** 1000) & (np.abs(uh) > 2.0 ** -860) & (np.abs(z) > 2.0 ** -860)
+    redo = ~safe
+    return _fma_redo(z.view(np.uint64), a, b, c, redo, fma_bits64, rounding).reshape(shape)
@@ -0,0 +1,158 @@
+"""
+Module: pipeline.py
+
+Streaming bulk conversion of decimal text files to IEEE-754 bit strings.
+
+Each stage is a generator (reader -> parser -> encoder -> formatter -> writer),
+so memory stays bounded no matter how large the input is.
+"""
+
+import argparse
+import sys
+import time
+
+from convert import float_to_bits64
+from strtof import parse_float32
+
+class PipelineStats:
+    """Per-stage item counts and timings plus the wall-clock time the run has taken.
+
+    Stages are nested generators, so the time measured around a stage's next()
+    includes every stage upstream of it; stage_seconds() subtracts that back out.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}                                 # inclusive of upstream stages
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def stage_seconds(self) -> dict:
+        """Time spent in each stage's own work."""
+        own, upstream = {}, 0.0
+        for stage, inclusive in self.seconds.items():
+            own[stage] = max(inclusive - upstream, 0.0)
+            upstream = inclusive
+        return own
+
+    def throughput(self) -> dict:
+        seconds = self.stage_seconds()
+        return {stage: count / (seconds.get(stage) or float('inf')) for stage, count in self.counts.items()}
+
+    def report(self) -> str:
+        rates = self.throughput()
+        seconds = self.stage_seconds()
+        return "\n".join(f"{stage:>8}: {self.counts[stage]:>12,} items  {seconds.get(stage, 0.0):>9.3f} s"
+                         f"  {rates[stage]:>14,.0f}/s" for stage in self.counts)
+
+def _counted(stage: str, items, stats):
+    if stats is None:
+        return items
+    stats.counts[stage] = 0
+    stats.seconds[stage] = 0.0
+    return _count_items(stage, items, stats.counts, stats.seconds)
+
+def _count_items(stage, items, counts, seconds):
+    clock = time.perf_counter
+    items = iter(items)
+    while True:
+        start = clock()
+        try:
+            item = next(items)
+        except StopIteration:
+            seconds[stage] += clock() - start
+            return
+        seconds[stage] += clock() - start
+        counts[stage] += 1
+        yield item
+
+def read_lines(source):
+    """Yield lines from a path or an already open text file."""
+    if hasattr(source, 'read'):
+        yield from source
+        return
+    with open(source, 'r') as fh:
+        yield from fh
+
+def parse_numbers(lines, precision: str = "32"):
+    """Yield (text, pattern) pairs, skipping blank lines and '#' comments.
+
+    32-bit values are rounded straight from the decimal text; float32(float(text))
+    would round twice.
+    """
+    parse = parse_float32 if precision == "32" else _parse_float64
+    for lineno, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text or text[0] == '#':
+            continue
+        try:
+            yield text, parse(text)
+        except ValueError:
+            raise ValueError(f"line {lineno}: not a decimal number: {text!r}") from None
+
+def _parse_float64(text: str) -> int:
+    return float_to_bits64(float(text))
+
+def encode(records, precision: str = "32"):
+    spec = "032b" if precision == "32" else "064b"
+    for text, bits in records:
+        yield text, format(bits, spec)
+
+def format_records(records, sep: str = "\t"):
+    for text, binary in records:
+        yield f"{text}{sep}{binary}\n"
+
+def write_chunked(lines, dest, chunk_lines: int = 8192) -> int:
+    """Write lines to a path or open file in joined chunks; returns the number written."""
+    if not hasattr(dest, 'write'):
+        with open(dest, 'w') as fh:
+            return write_chunked(lines, fh, chunk_lines)
+    buffer, written = [], 0
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_lines:
+            dest.write("".join(buffer))
+            written += len(buffer)
+            buffer.clear()
+    if buffer:
+        dest.write("".join(buffer))
+        written += len(buffer)
+    return written
+
+def run(source, dest, precision: str = "32", sep: str = "\t", chunk_lines: int = 8192,
+        stats: PipelineStats = None) -> int:
+    lines = _counted("read", read_lines(source), stats)
+    records = _counted("parse", parse_numbers(lines, precision), stats)
+    encoded = _counted("encode", encode(records, precision), stats)
+    formatted = _counted("format", format_records(encoded, sep), stats)
+    start = time.perf_counter()
+    try:
+        written = write_chunked(formatted, dest, chunk_lines)
+    finally:
+        if stats is not None:
+            stats.finished = time.perf_counter()
+    if stats is not None:
+        stats.counts["write"] = written
+        stats.seconds["write"] = stats.finished - start
+    return written
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a file of decimal numbers to IEEE-754 bit strings.")
+    parser.add_argument("input", help="text file with one decimal number per line ('-' for stdin)")
+    parser.add_argument("output", nargs="?", default="-", help="destination file (default: stdout)")
+    parser.add_argument("-p", "--precision", choices=["32", "64"], default="32")
+    parser.add_argument("--stats", action="store_true", help="print per-stage counts, time and throughput to stderr")
+    args = parser.parse_args(argv)
+    source = sys.stdin if args.input == "-" else args.input
+    dest = sys.stdout if args.output == "-" else args.output
+    stats = PipelineStats() if args.stats else None
+    run(source, dest, args.precision, stats=stats)
+    if stats is not None:
+        print(stats.report(), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Module: strtof.py
+
+Correctly rounded decimal string -> float32 conversion, bit-exact with C strtof.
+
+float32(float(s)) rounds twice and is wrong when the float64 result lands exactly
+on a float32 halfway point. Those are the only failures: every float32 midpoint is
+itself a float64, so a midpoint strictly between the decimal and its float64
+rounding would have been the closer float64. The fast path therefore lets the
+C-level float() parse, checks the dropped bits for an exact midpoint, and only
+then falls back to exact big-integer rounding.
+"""
+
+import array
+from decimal import Decimal, InvalidOperation
+
+from convert import bits_to_float32, float_to_bits32, float_to_bits64
+from formats import BINARY32
+
+def _is_float32_midpoint(bits64: int) -> bool:
+    """True if the float64 pattern lies exactly halfway between two float32 values."""
+    exp = ((bits64 >> 52) & 0x7FF) - 1023
+    if exp >= -126:
+        return bits64 & 0x1FFFFFFF == 0x10000000
+    if exp < -150:
+        return False
+    drop = 29 - 126 - exp                                 # extra bits lost in the float32 subnormal range
+    sig = (bits64 & 0xFFFFFFFFFFFFF) | (1 << 52)
+    return sig & ((1 << drop) - 1) == 1 << (drop - 1)
+
+def _slow_path(text: str) -> int:
+    try:
+        return BINARY32.encode(Decimal(text.strip()))
+    except InvalidOperation:
+        raise ValueError(f"could not convert string to float32: {text!r}") from None
+
+def parse_float32(text: str) -> int:
+    """Pattern of the float32 nearest to the decimal in `text` (ties to even)."""
+    if '_' in text:
+        raise ValueError(f"could not convert string to float32: {text!r}")
+    value = float(text)
+    bits64 = float_to_bits64(value)
+    if _is_float32_midpoint(bits64):
+        return _slow_path(text)
+    try:
+        return float_to_bits32(value)
+    except OverflowError:
+        return (bits64 >> 32) & 0x80000000 | 0x7F800000
+
+def strtof(text: str) -> float:
+    """Value of `text` rounded to float32, returned as a Python float."""
+    return bits_to_float32(parse_float32(text))
+
+def parse_float32_batch(texts) -> array.array:
+    """Parse a column of decimal strings into an array of float32 patterns."""
+    return array.array('I', map(parse_float32, texts))
@@ -0,0 +1,95 @@
+"""
+Module: test_convert.py
+
+Regression tests for the array conversions and the conversion cache in convert.py.
+"""
+
+import math
+import unittest
+
+import convert
+import formats
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class BitStringArrayTest(unittest.TestCase):
+    ONE = "00111111100000000000000000000000"
+
+    def test_exact_width_decodes(self):
+        self.assertEqual(convert.ieee754_to_float_array([self.ONE, "0" * 32]).tolist(), [1.0, 0.0])
+        self.assertEqual(convert.strings_array_to_bits(np.array([self.ONE], dtype='S32'), 32).tolist(),
+                         [0x3F800000])
+
+    def test_too_long_strings_are_rejected(self):
+        for extra in ("11", "111111"):
+            with self.assertRaisesRegex(ValueError, "32-bit"):
+                convert.ieee754_to_float_array([self.ONE + extra])
+        with self.assertRaisesRegex(ValueError, "16-bit"):
+            convert.ieee754_to_float_16_array(np.array(["0" * 17], dtype='S17'))
+
+    def test_too_short_strings_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "got 31 characters at index 1"):
+            convert.ieee754_to_float_array([self.ONE, self.ONE[:31]])
+        with self.assertRaisesRegex(ValueError, "8-bit"):
+            convert.ieee754_to_float_fp8_array(["0101"])
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class BulkPackTest(unittest.TestCase):
+    def test_lists_overflow_like_arrays(self):
+        values = [1e300, -1e300, 1.5]
+        for byteorder in ("little", "big"):
+            with np.errstate(over="ignore"):
+                expected = convert.floats_to_bytes(np.array(values), 32, byteorder)
+                self.assertEqual(convert.floats_to_bytes(values, 32, byteorder), expected)
+                self.assertEqual(convert.floats_to_bytes(iter(values), 32, byteorder), expected)
+            self.assertEqual(convert.bytes_to_floats(expected, 32, byteorder), (math.inf, -math.inf, 1.5))
+
+    def test_lists_match_arrays(self):
+        values = [0.1, -2.5, 3.4028234663852886e38, 5e-324]
+        for width in (32, 64):
+            self.assertEqual(convert.floats_to_bytes(values, width),
+                             convert.floats_to_bytes(np.array(values), width))
+
+class CensusTest(unittest.TestCase):
+    def test_fallback_takes_floats_and_patterns(self):
+        values = [1.0, -0.0, math.inf, math.nan, 1e-40, 1e300]
+        counts = convert.census(values, 32)
+        self.assertEqual(counts["normal"], {"+": 1, "-": 0})
+        self.assertEqual(counts["zero"], {"+": 0, "-": 1})
+        self.assertEqual(counts["subnormal"], {"+": 1, "-": 0})
+        self.assertEqual(counts["infinity"], {"+": 2, "-": 0})
+        self.assertEqual(convert.census([convert.float_to_bits64(v) for v in values], 64),
+                         convert.census(values, 64))
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_fallback_matches_arrays(self):
+        values = [1.0, -0.0, math.inf, -math.nan, 5e-324, -2.5]
+        self.assertEqual(convert.census(values, 64), convert.census(np.array(values), 64))
+
+class ConversionCacheTest(unittest.TestCase):
+    def tearDown(self):
+        convert.disable_conversion_cache()
+
+    def test_counts_and_eviction(self):
+        cache = convert.enable_conversion_cache(maxsize=2)
+        self.assertNotIsInstance(cache, formats.PowerCache)
+        self.assertFalse(hasattr(cache, "power"))
+        for value in (1.0, -0.0, 1.0, 0.0):
+            convert.float_to_ieee754(value)
+        self.assertEqual(convert.conversion_cache_info(),
+                         {"hits": 1, "misses": 3, "evictions": 1, "size": 2, "maxsize": 2})
+        self.assertEqual(convert.float_to_ieee754(-0.0), "1" + "0" * 31)
+
+    def test_power_cache_shares_the_lru(self):
+        cache = formats.PowerCache(maxsize=1)
+        self.assertEqual(cache.power(5, 3), 125)
+        self.assertEqual(cache.power(5, 3), 125)
+        self.assertEqual(cache.power(10, 2), 100)
+        self.assertEqual(cache.info(), {"hits": 1, "misses": 2, "evictions": 1, "size": 1, "maxsize": 1})
+
+if __name__ == "__main__":
+    unittest.main()
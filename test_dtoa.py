@@ -0,0 +1,68 @@
+"""
+Module: test_dtoa.py
+
+Regression tests for dtoa.py: shortest output must read back to the same pattern
+and no string with one digit fewer may do so.
+"""
+
+import random
+import unittest
+from decimal import Decimal
+
+import dtoa
+from convert import float_to_bits64
+from formats import BINARY16, BFLOAT16, BINARY32, BINARY64
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class ShortestReprTest(unittest.TestCase):
+    def check_shortest(self, bits: int, fmt):
+        sign, digits, exponent = dtoa.shortest_digits(bits, fmt)
+        text = dtoa.shortest_repr(bits, fmt)
+        self.assertEqual(fmt.encode(Decimal(text)), bits, f"{fmt.name} {bits:#x} -> {text}")
+        if digits >= 10:
+            shorter = digits // 10
+            for candidate in (shorter, shorter + 1):
+                value = Decimal((sign, Decimal(candidate).as_tuple().digits, exponent + 1))
+                self.assertNotEqual(fmt.encode(value), bits, f"{fmt.name} {bits:#x}: {value} also round-trips")
+
+    def check_all_patterns(self, fmt):
+        for bits in range(1 << fmt.width):
+            if (bits >> fmt.mbits) & fmt.exp_max != fmt.exp_max:
+                self.check_shortest(bits, fmt)
+
+    def test_binary16_exhaustive(self):
+        self.check_all_patterns(BINARY16)
+
+    def test_bfloat16_exhaustive(self):
+        self.check_all_patterns(BFLOAT16)
+
+    def test_specials(self):
+        self.assertEqual(dtoa.shortest_repr(BINARY32.inf_bits), "inf")
+        self.assertEqual(dtoa.shortest_repr(BINARY32.inf_bits | BINARY32.sign_mask), "-inf")
+        self.assertEqual(dtoa.shortest_repr(BINARY32.qnan_bits), "nan")
+        self.assertEqual(dtoa.shortest_repr(BINARY32.sign_mask), "-0.0")
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_float32_against_numpy(self):
+        rng = random.Random(13)
+        for _ in range(20000):
+            bits = rng.getrandbits(31) | rng.getrandbits(1) << 31
+            if (bits >> 23) & 0xFF == 0xFF:
+                continue
+            expected = np.format_float_scientific(np.uint32(bits).view(np.float32), unique=True)
+            self.assertEqual(Decimal(dtoa.shortest_repr(bits)), Decimal(expected), f"{bits:#x}")
+            self.check_shortest(bits, BINARY32)
+
+    def test_render_cut_overs(self):
+        # repr() switches to exponent notation at 1e16 and below 1e-4
+        for value in (1e16, 9999999999999998.0, 1e15, 123456789012345678.0, 1e-05, 1.5e-05,
+                      9.999e-05, 0.0001, 0.00012, 1.0, 100.0, 5e-324, 1.7976931348623157e308):
+            for signed in (value, -value):
+                self.assertEqual(dtoa.shortest_repr(float_to_bits64(signed), BINARY64), repr(signed))
+
+if __name__ == "__main__":
+    unittest.main()
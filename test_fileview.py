@@ -0,0 +1,50 @@
+"""
+Module: test_fileview.py
+
+Regression tests for FloatFile in fileview.py: reading records back and releasing
+the file when construction fails.
+"""
+
+import builtins
+import mmap
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import convert
+import fileview
+
+class FloatFileTest(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp()
+        with os.fdopen(handle, 'wb') as out:
+            out.write(convert.floats_to_bytes([1.0, -2.0], 32, 'little'))
+        self.addCleanup(os.remove, self.path)
+
+    def test_reads_records(self):
+        with fileview.FloatFile(self.path, 32, 'little') as view:
+            self.assertEqual(len(view), 2)
+            self.assertEqual(view.bits(-1), 0xC0000000)
+            self.assertEqual(list(view.iter_bits()), [0x3F800000, 0xC0000000])
+
+    def test_bad_byteorder_is_rejected_before_opening(self):
+        with mock.patch.object(builtins, 'open', wraps=open) as opened:
+            with self.assertRaisesRegex(ValueError, "byteorder"):
+                fileview.FloatFile(self.path, 32, 'middle')
+        opened.assert_not_called()
+
+    def test_file_is_closed_when_mapping_fails(self):
+        files, real_open = [], open
+        def tracking_open(*args, **kwargs):
+            files.append(real_open(*args, **kwargs))
+            return files[-1]
+        with mock.patch.object(builtins, 'open', tracking_open), \
+             mock.patch.object(mmap, 'mmap', side_effect=OSError("no mapping")):
+            with self.assertRaisesRegex(OSError, "no mapping"):
+                fileview.FloatFile(self.path)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""
+Module: test_ops.py
+
+Regression tests for the soft-float engine in ops.py: random patterns checked
+against exact Fraction arithmetic in every rounding mode, plus the special cases
+and the vectorized FMA against the scalar one.
+"""
+
+import random
+import unittest
+from fractions import Fraction
+
+import ops
+from formats import BINARY32, BINARY64, ROUNDING_MODES, ROUND_NEAREST_EVEN, ROUND_NEAREST_AWAY, \
+                    ROUND_TOWARD_ZERO, ROUND_UPWARD, ROUND_DOWNWARD
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CASES = 400
+
+def reference_round(value: Fraction, fmt, rounding: str) -> int:
+    """Pattern of the nonzero `value` rounded to `fmt`, worked out directly from the definition."""
+    sign = 1 if value < 0 else 0
+    value = abs(value)
+    exp = value.numerator.bit_length() - value.denominator.bit_length()
+    if Fraction(2) ** exp > value:
+        exp -= 1
+    exp = max(exp, fmt.emin)
+    scaled = value / Fraction(2) ** (exp - fmt.mbits)
+    kept = scaled.numerator // scaled.denominator
+    rem = scaled - kept
+    if rounding == ROUND_NEAREST_EVEN:
+        kept += rem > Fraction(1, 2) or (rem == Fraction(1, 2) and kept & 1)
+    elif rounding == ROUND_NEAREST_AWAY:
+        kept += rem >= Fraction(1, 2)
+    elif rounding == ROUND_UPWARD:
+        kept += rem > 0 and not sign
+    elif rounding == ROUND_DOWNWARD:
+        kept += rem > 0 and sign
+    if kept >> (fmt.mbits + 1):
+        kept >>= 1
+        exp += 1
+    if exp > fmt.emax:
+        toward_zero = rounding == ROUND_TOWARD_ZERO or rounding == (ROUND_UPWARD if sign else ROUND_DOWNWARD)
+        return sign << fmt.sign_shift | (fmt.max_normal_bits if toward_zero else fmt.inf_bits)
+    if not kept >> fmt.mbits:
+        return sign << fmt.sign_shift | kept
+    return sign << fmt.sign_shift | (exp + fmt.bias) << fmt.mbits | (kept & fmt.mant_mask)
+
+def random_finite(rng: random.Random, fmt, near: int = None) -> int:
+    """A finite pattern; with `near`, its biased exponent lies within a few binades of it."""
+    bits = rng.getrandbits(fmt.width)
+    if near is None:
+        exp = rng.randrange(fmt.exp_max)
+    else:
+        exp = min(max(near + rng.randint(-fmt.mbits - 4, fmt.mbits + 4), 0), fmt.exp_max - 1)
+    return bits & ~fmt.exp_mask | exp << fmt.mbits
+
+class SoftFloatTest(unittest.TestCase):
+    ENGINES = (
+        (BINARY32, ops.add_bits32, ops.mul_bits32, ops.div_bits32, ops.sqrt_bits32, ops.fma_bits32),
+        (BINARY64, ops.add_bits64, ops.mul_bits64, ops.div_bits64, ops.sqrt_bits64, ops.fma_bits64),
+    )
+
+    def check(self, result: int, value: Fraction, fmt, rounding: str, *operands):
+        if value:
+            self.assertEqual(result, reference_round(value, fmt, rounding),
+                             f"{fmt.name} {rounding} {[hex(x) for x in operands]}")
+
+    def test_add_mul_div(self):
+        rng = random.Random(20240601)
+        for fmt, add, mul, div, _, _ in self.ENGINES:
+            for _ in range(CASES):
+                a = random_finite(rng, fmt)
+                b = random_finite(rng, fmt, near=(a >> fmt.mbits) & fmt.exp_max)
+                c = random_finite(rng, fmt, near=fmt.bias * 2 - ((a >> fmt.mbits) & fmt.exp_max))
+                x, y, z = fmt.decode_exact(a), fmt.decode_exact(b), fmt.decode_exact(c)
+                for rounding in ROUNDING_MODES:
+                    self.check(add(a, b, rounding), x + y, fmt, rounding, a, b)
+                    self.check(mul(a, c, rounding), x * z, fmt, rounding, a, c)
+                    if y:
+                        self.check(div(a, b, rounding), x / y, fmt, rounding, a, b)
+
+    def test_sqrt(self):
+        rng = random.Random(7)
+        for fmt, _, _, _, sqrt, _ in self.ENGINES:
+            for _ in range(CASES):
+                a = random_finite(rng, fmt) & fmt.abs_mask or 1
+                x = fmt.decode_exact(a)
+                for rounding in ROUNDING_MODES:
+                    r = sqrt(a, rounding)
+                    low, high = fmt.decode_exact(r - 1), fmt.decode_exact(r + 1)
+                    root = fmt.decode_exact(r)
+                    if rounding == ROUND_UPWARD:
+                        self.assertTrue(low * low < x <= root * root)
+                    elif rounding in (ROUND_DOWNWARD, ROUND_TOWARD_ZERO):
+                        self.assertTrue(root * root <= x < high * high)
+                    else:
+                        self.assertTrue((low + root) ** 2 / 4 <= x <= (root + high) ** 2 / 4)
+
+    def test_fma(self):
+        rng = random.Random(99)
+        for fmt, _, mul, _, _, fma in self.ENGINES:
+            for _ in range(CASES):
+                a = random_finite(rng, fmt)
+                b = random_finite(rng, fmt, near=fmt.bias)
+                product = mul(a, b)
+                if rng.random() < 0.3 and product & fmt.abs_mask < fmt.inf_bits:
+                    c = product ^ fmt.sign_mask                # near-total cancellation
+                else:
+                    c = random_finite(rng, fmt, near=(product >> fmt.mbits) & fmt.exp_max)
+                value = fmt.decode_exact(a) * fmt.decode_exact(b) + fmt.decode_exact(c)
+                for rounding in ROUNDING_MODES:
+                    self.check(fma(a, b, c, rounding), value, fmt, rounding, a, b, c)
+
+    def test_special_values(self):
+        for fmt, add, mul, div, sqrt, fma in self.ENGINES:
+            one, inf, neg = fmt.bias << fmt.mbits, fmt.inf_bits, fmt.sign_mask
+            snan, qnan, indefinite = fmt.inf_bits | 1, fmt.qnan_bits | 5, neg | fmt.qnan_bits
+            self.assertEqual(add(inf, inf | neg), indefinite)
+            self.assertEqual(mul(inf, 0), indefinite)
+            self.assertEqual(div(0, neg), indefinite)
+            self.assertEqual(div(one, neg), neg | inf)
+            self.assertEqual(sqrt(neg | one), indefinite)
+            self.assertEqual(add(qnan, snan), qnan)             # first NaN wins, even over a signaling one
+            self.assertEqual(mul(one, snan | neg), snan | neg | 1 << (fmt.mbits - 1))
+            self.assertEqual(fma(inf, 0, qnan), qnan)
+            self.assertEqual(sqrt(neg), neg)
+            self.assertEqual(add(snan, one), snan | 1 << (fmt.mbits - 1))
+            self.assertEqual(add(neg, neg), neg)
+            self.assertEqual(add(one, neg | one), 0)
+            self.assertEqual(add(one, neg | one, ROUND_DOWNWARD), neg)
+            self.assertEqual(fma(one, neg | one, one), 0)
+            self.assertEqual(mul(fmt.max_normal_bits, fmt.max_normal_bits, ROUND_TOWARD_ZERO),
+                             fmt.max_normal_bits)
+
+    @unittest.skipIf(np is None, "numpy is not installed")
+    def test_fma_array_matches_scalar(self):
+        rng = np.random.default_rng(5)
+        for width, dtype, fma_array, fma in ((32, np.uint32, ops.fma_bits32_array, ops.fma_bits32),
+                                             (64, np.uint64, ops.fma_bits64_array, ops.fma_bits64)):
+            ftype = np.float32 if width == 32 else np.float64
+            a, b, c = (rng.standard_normal(2000) * np.exp2(rng.integers(-60, 60, 2000)) for _ in range(3))
+            c[:500] = -(a[:500] * b[:500])
+            a, b, c = (x.astype(ftype).view(dtype) for x in (a, b, c))
+            bits = [rng.integers(0, 2 ** 62, 500, dtype=np.uint64).astype(dtype) for _ in range(3)]
+            a, b, c = (np.concatenate([x, y]) for x, y in zip((a, b, c), bits))
+            for rounding in (ROUND_NEAREST_EVEN, ROUND_UPWARD):
+                expected = [fma(x, y, z, rounding) for x, y, z in zip(a.tolist(), b.tolist(), c.tolist())]
+                self.assertEqual(fma_array(a, b, c, rounding).tolist(), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Module: test_strtof.py
+
+Regression tests for strtof.py: decimal strings at and next to float32 halfway
+points must round exactly like BINARY32.encode(Decimal(s)).
+"""
+
+import random
+import unittest
+from decimal import Decimal, localcontext
+
+import strtof
+from formats import BINARY32
+
+def midpoint(bits: int) -> Decimal:
+    """Exact decimal halfway between the positive float32 pattern `bits` and the next one up."""
+    value = (BINARY32.decode_exact(bits) + BINARY32.decode_exact(bits + 1)) / 2
+    with localcontext() as ctx:
+        ctx.prec = 2000
+        return Decimal(value.numerator) / Decimal(value.denominator)
+
+def neighbours(mid: Decimal) -> tuple:
+    """The midpoint and decimals a hair below and above it."""
+    with localcontext() as ctx:
+        ctx.prec = 2000
+        nudge = Decimal((0, (1,), mid.adjusted() - 60))
+        return mid, mid - nudge, mid + nudge
+
+class StrtofTest(unittest.TestCase):
+    def check(self, text: str):
+        self.assertEqual(strtof.parse_float32(text), BINARY32.encode(Decimal(text)), text)
+
+    def check_around(self, bits: int):
+        for value in neighbours(midpoint(bits)):
+            self.check(str(value))
+            self.check("-" + str(value))
+
+    def test_normal_midpoints(self):
+        rng = random.Random(14)
+        for _ in range(300):
+            self.check_around(rng.randrange(0x00800000, 0x7F7FFFFF))
+
+    def test_subnormal_midpoints(self):
+        rng = random.Random(41)
+        for bits in [0, 1, 2, 0x7FFFFE] + [rng.randrange(0x007FFFFF) for _ in range(100)]:
+            self.check_around(bits)
+
+    def test_overflow_threshold(self):
+        self.assertEqual(strtof.parse_float32("3.40282356779733661637539395458142568448e38"), 0x7F800000)
+        self.assertEqual(strtof.parse_float32("3.40282356779733661637539395458142568447e38"), 0x7F7FFFFF)
+        self.assertEqual(strtof.parse_float32("-1e39"), 0xFF800000)
+
+    def test_plain_values(self):
+        for text in ("0.1", "1", "-0.0", "1e-45", "7e-46", "inf", "-Infinity", "  2.5  "):
+            self.check(text)
+
+    def test_underscores_rejected(self):
+        with self.assertRaises(ValueError):
+            strtof.parse_float32("1_0")
+
+if __name__ == "__main__":
+    unittest.main()
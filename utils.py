@@ -3,8 +3,53 @@ Module: utils.py
 Helper functions for bit manipulations, shifts, etc.
 """
 
+import array
+import sys
+
 def shift_right(binary: str, n: int) -> str:
     return ("0" * n + binary)[:len(binary)]
 
 def shift_left(binary: str, n: int) -> str:
     return (binary[n:] + "0" * n)[:len(binary)]
+
+# --- Batch bit-string formatting/parsing ---
+
+_ARRAY_CODE = {32: 'I', 64: 'Q'}
+
+def _packed_big_endian(patterns, width: int) -> bytes:
+    packed = array.array(_ARRAY_CODE[width], patterns)
+    if packed.itemsize != width // 8:
+        raise ValueError(f"no native {width}-bit array type on this platform")
+    if sys.byteorder == 'little':
+        packed.byteswap()
+    return packed.tobytes()
+
+def format_bits_batch(patterns, width: int = 32, sep: str = "\n") -> str:
+    """Format many patterns into one string, `sep` between (and after) each pattern."""
+    data = _packed_big_endian(patterns, width)
+    if not data:
+        return ""
+    # One big-int render of the packed buffer beats per-value formatting.
+    text = format(int.from_bytes(data, 'big'), f"0{len(data) * 8}b")
+    if not sep:
+        return text
+    return "".join([text[i:i + width] + sep for i in range(0, len(text), width)])
+
+def parse_bits_batch(text: str, width: int = 32, sep: str = "\n") -> array.array:
+    """Parse `sep`-separated patterns of exactly `width` bits into an unsigned array."""
+    result = array.array(_ARRAY_CODE[width])
+    if not text:
+        return result
+    if sep and not text.endswith(sep):
+        text += sep
+    stride = width + len(sep)
+    count = len(text) // stride
+    if len(text) % stride or any(text[width + k::stride] != ch * count for k, ch in enumerate(sep)):
+        raise ValueError(f"input is not a sequence of {width}-bit patterns")
+    digits = text.replace(sep, "") if sep else text
+    if len(digits) != count * width or digits.encode('ascii', 'replace').translate(None, b"01"):
+        raise ValueError(f"input is not a sequence of {width}-bit patterns")
+    result.frombytes(int(digits, 2).to_bytes(count * width // 8, 'big'))
+    if sys.byteorder == 'little':
+        result.byteswap()
+    return result